@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from spatial_calib_xray.model   import InitCircle
+from spatial_calib_xray.display import Display
+
+# Constant...
+num = 1000
+
+# Read the max pooled image...
+fl_img_max = "mfxlv4920.42.epix10k2M.max.npy"
+img = np.load(fl_img_max)
+
+# Normalize image...
+img = (img - np.mean(img)) / np.std(img)
+
+# Seed a circle with three clicks...
+disp_manager = Display(img, figsize = (12, 12))
+disp_manager.select_circle(is_save = False)
+crds_pt1, crds_pt2, crds_pt3 = disp_manager.crds_mouse
+cx, cy, r = InitCircle(crds_pt1, crds_pt2, crds_pt3).solve()
+
+# Drag the center or radius handle until the fit sits on the ring, then press any key...
+cx, cy, r = disp_manager.refine_circle(cx, cy, r, num = num)
+print(f"cx = {cx}, cy = {cy}, r = {r}")
+
+disp_manager.close()
@@ -37,3 +37,5 @@ for _ in range(1):
     crds = model.crds
     disp_manager.show(crds_init, crds, is_save = False)
     circle_list.append(res.params)
+
+disp_manager.close()
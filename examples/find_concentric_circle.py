@@ -3,7 +3,7 @@
 
 import numpy as np
 from spatial_calib_xray.model   import OptimizeConcentricCircles, InitCircle
-from spatial_calib_xray.display import Display, DisplayConcentricCircles
+from spatial_calib_xray.display import DisplayConcentricCircles
 
 # Constant...
 num = 1000
@@ -15,9 +15,11 @@ img = np.load(fl_img_max)
 # Normalize image...
 img = (img - np.mean(img)) / np.std(img)
 
+# One display session for selecting rings and showing the fit...
+disp_manager = DisplayConcentricCircles(img, figsize = (12, 12))
+
 params_list   = []
 for _ in range(3):
-    disp_manager = Display(img, figsize = (12, 12))
     disp_manager.select_circle(is_save = False)
 
     # Form init circle...
@@ -45,5 +47,5 @@ model.report_fit(res)
 crds = model.crds
 crds = crds.reshape(2, -1, num)
 
-disp_manager = DisplayConcentricCircles(img, figsize = (12, 12))
 disp_manager.show(crds_init, crds, is_save = False)
+disp_manager.close()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from spatial_calib_xray.model     import OptimizeConcentricCircles
+from spatial_calib_xray.correlate import FriedelCenter
+from spatial_calib_xray.radial    import RadialProfile, find_rings
+from spatial_calib_xray.display   import DisplayConcentricCircles
+
+# Constant...
+num = 1000
+
+# Read the max pooled image...
+fl_img_max = "mfxlv4920.42.epix10k2M.max.npy"
+img = np.load(fl_img_max)
+
+# Normalize image...
+img = (img - np.mean(img)) / np.std(img)
+
+# Seed the center without clicks...
+cx, cy = FriedelCenter(bin_size = 4).find(img)
+
+# Enumerate rings from the radial profile...
+radial_profile = RadialProfile(img.shape, cx, cy)
+r = find_rings(radial_profile.r, radial_profile(img), prominence = 0.5, width = 2.0)
+
+# Create a concentric circle model...
+model = OptimizeConcentricCircles(cx = cx, cy = cy, r = r, num = num)
+model.generate_crds()
+crds_init = model.crds.copy()
+
+crds_init = crds_init.reshape(2, -1, num)
+
+# Fitting...
+res = model.fit(img)
+model.report_fit(res)
+crds = model.crds
+crds = crds.reshape(2, -1, num)
+
+disp_manager = DisplayConcentricCircles(img, figsize = (12, 12))
+disp_manager.show(crds_init, crds, is_save = False)
+disp_manager.close()
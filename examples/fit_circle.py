@@ -28,5 +28,6 @@ model.report_fit(res)
 crds = model.crds
 
 # Display an image...
-disp_manager = Display(img, crds_init, crds, figsize = (10, 8))
-disp_manager.show(is_save = False)
+disp_manager = Display(img, figsize = (10, 8))
+disp_manager.show(crds_init, crds, is_save = False)
+disp_manager.close()
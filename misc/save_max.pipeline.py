@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import psana
+import numpy as np
+import os
+from spatial_calib_xray.pipeline import FramePipeline
+from spatial_calib_xray.pool     import MaxPool, PixelMapAssembler
+
+class PsanaImg:
+    """
+    For online data, set up environment variable correctly.
+
+    ```
+    export SIT_PSDM_DATA=/cds/data/drpsrcf
+    ```
+
+    It serves as an image accessing layer based on the data management system
+    psana in LCLS.
+    """
+
+    def __init__(self, exp, run, mode, detector_name):
+        # Biolerplate code to access an image
+        # Set up data source
+        self.datasource_id   = f"exp={exp}:run={run}:{mode}"
+        self.datasource      = psana.DataSource( self.datasource_id )
+        self.run_current     = next(self.datasource.runs())
+        self.timestamps      = self.run_current.times()
+        self.event_num_total = len(self.timestamps)
+
+        # Set up detector
+        self.detector = psana.Detector(detector_name)
+
+
+    def get(self, event_num, mode = "image"):
+        # Fetch the timestamp according to event number...
+        timestamp = self.timestamps[int(event_num)]
+
+        # Access each event based on timestamp...
+        event = self.run_current.event(timestamp)
+
+        # Only three modes are supported...
+        assert mode in ("raw", "image", "calib"), f"Mode {mode} is not allowed!!!  Only 'raw' or 'image' are supported."
+
+        # Fetch image data based on timestamp from detector...
+        read = { "image" : self.detector.image,
+                 "calib" : self.detector.calib, }
+        img = read[mode](event)
+
+        return img
+
+
+    def get_indexes(self, event_num = 0):
+        """
+        Return (row, col) of every unassembled pixel in the assembled image.
+        """
+        timestamp = self.timestamps[int(event_num)]
+        event     = self.run_current.event(timestamp)
+
+        # psana indexes rows by iX and columns by iY...
+        iX, iY = self.detector.indexes_xy(event)
+
+        return iX, iY
+
+
+
+
+class PsanaFrameReader:
+    """
+    Open the data source lazily so that each reader process has its own.
+    """
+
+    def __init__(self, exp, run, mode, detector_name):
+        self.args       = (exp, run, mode, detector_name)
+        self.img_reader = None
+
+
+    def __call__(self, event_num):
+        if self.img_reader is None: self.img_reader = PsanaImg(*self.args)
+
+        return self.img_reader.get(event_num, mode = "calib")
+
+
+
+
+# Specify the dataset and detector...
+exp, run, mode, detector_name = 'mfxlv4920', '42', 'idx', 'epix10k2M'
+
+# Number of processes for reading and for pooling...
+num_readers, num_reducers = 6, 2
+
+# Find out the unassembled (seg, rows, cols) shape and the number of events...
+img_reader = PsanaImg(exp, run, mode, detector_name)
+img_sample = img_reader.get(0, mode = "calib")
+
+# Max pool all unassembled frames...
+pipeline = FramePipeline( PsanaFrameReader(exp, run, mode, detector_name),
+                          img_sample.shape,
+                          dtype        = img_sample.dtype,
+                          make_reducer = MaxPool,
+                          num_readers  = num_readers,
+                          num_reducers = num_reducers, )
+pool = pipeline.run(range(img_reader.event_num_total))
+
+# Assemble only the pooled result...
+iy, ix   = img_reader.get_indexes()
+assemble = PixelMapAssembler(iy, ix)
+imgs_max = assemble(pool.result())
+fl_output = f"{exp}.{run}.{detector_name}.max.npy"
+path_output = os.path.join(os.getcwd(), fl_output)
+np.save(path_output, imgs_max)
@@ -1,4 +1,17 @@
-from . import display, model
+from . import algebraic, cloud, correlate, display, drift, export, model, monitor, parallel, pipeline, polar, pool, radial, selection, uncertainty
 
-__all__ = [ "display",
-            "model", ]
+__all__ = [ "algebraic",
+            "cloud",
+            "correlate",
+            "display",
+            "drift",
+            "export",
+            "model",
+            "monitor",
+            "parallel",
+            "pipeline",
+            "polar",
+            "pool",
+            "radial",
+            "selection",
+            "uncertainty", ]
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from .polar import PolarTransform
+
+
+def extract_ring_points(img, cx, cy, r, half_width = 5.0, num_theta = 360, order = 1):
+    """
+    Extract sub-pixel ring peak points along radial rays from (cx, cy).
+
+    Each ring is searched within `half_width` of its radius in `r`.  Return
+    the x and y of all points and the index of the ring each belongs to.
+    """
+    r = np.array([r], dtype = np.float64).reshape(-1)
+
+    polar_trans = PolarTransform(max(r.min() - half_width - 1, 0.0), r.max() + half_width + 1,
+                                 num_theta = num_theta, order = order, decimals = 6, max_cache = 1)
+    polar, (cx, cy) = polar_trans.remap(img, cx, cy)
+    peaks = polar_trans.find_peaks(polar, r, half_width)
+
+    idx_ring, idx_theta = np.nonzero(np.isfinite(peaks))
+    radius = peaks[idx_ring, idx_theta]
+    theta  = polar_trans.theta[idx_theta]
+
+    x = cx + radius * np.cos(theta)
+    y = cy + radius * np.sin(theta)
+
+    return x, y, idx_ring
+
+
+def geometric_covariance(x, y, idx_ring, cx, cy, r):
+    """
+    Estimate the covariance of (cx, cy, r0, r1, ...) from the geometric
+    residuals, i.e. distances of the points to their circles.
+    """
+    r = np.array([r], dtype = np.float64).reshape(-1)
+    num_params = 2 + len(r)
+
+    dx, dy = x - cx, y - cy
+    d   = np.hypot(dx, dy)
+    res = d - r[idx_ring]
+
+    # Jacobian of the residuals...
+    J = np.zeros((len(x), num_params))
+    J[:, 0] = -dx / d
+    J[:, 1] = -dy / d
+    J[np.arange(len(x)), 2 + idx_ring] = -1.0
+
+    dof = max(len(x) - num_params, 1)
+    s2  = res @ res / dof
+
+    return s2 * np.linalg.pinv(J.T @ J)
+
+
+def fit_circle_kasa(x, y):
+    """
+    Kasa fit: least squares on x^2 + y^2 + D x + E y + F = 0.  Fast, but
+    biased toward smaller circles for short arcs.
+    """
+    A = np.stack([x, y, np.ones_like(x)], axis = 1)
+    (D, E, F), *_ = np.linalg.lstsq(A, -(x**2 + y**2), rcond = None)
+
+    cx, cy = -D / 2, -E / 2
+    r = np.sqrt(cx**2 + cy**2 - F)
+
+    return cx, cy, r
+
+
+def fit_circle_taubin(x, y):
+    """
+    Taubin fit by SVD, following Chernov's implementation.
+    """
+    x0, y0 = x.mean(), y.mean()
+    x, y   = x - x0, y - y0
+    z      = x**2 + y**2
+    z_mean = z.mean()
+
+    z0 = (z - z_mean) / (2 * np.sqrt(z_mean))
+    _, _, Vt = np.linalg.svd(np.stack([z0, x, y], axis = 1), full_matrices = False)
+
+    A = Vt[2].copy()
+    A[0] /= 2 * np.sqrt(z_mean)
+    A = np.append(A, -z_mean * A[0])
+
+    cx = -A[1] / A[0] / 2 + x0
+    cy = -A[2] / A[0] / 2 + y0
+    r  = np.sqrt(A[1]**2 + A[2]**2 - 4 * A[0] * A[3]) / abs(A[0]) / 2
+
+    return cx, cy, r
+
+
+def fit_circle_pratt(x, y):
+    """
+    Pratt fit by SVD, following Chernov's implementation.
+    """
+    x0, y0 = x.mean(), y.mean()
+    x, y   = x - x0, y - y0
+    z      = x**2 + y**2
+
+    _, S, Vt = np.linalg.svd(np.stack([z, x, y, np.ones_like(x)], axis = 1), full_matrices = False)
+
+    if S[3] / S[0] < 1e-12:
+        # Points lie exactly on a circle...
+        A = Vt[3]
+    else:
+        W     = Vt.T @ np.diag(S) @ Vt
+        B_inv = np.array([ [  0.0, 0.0, 0.0, -0.5 ],
+                           [  0.0, 1.0, 0.0,  0.0 ],
+                           [  0.0, 0.0, 1.0,  0.0 ],
+                           [ -0.5, 0.0, 0.0,  0.0 ], ])
+        evals, evecs = np.linalg.eig(W @ B_inv @ W)
+        evals, evecs = evals.real, evecs.real
+
+        # The solution belongs to the smallest positive eigenvalue...
+        idx_sorted = np.argsort(evals)
+        idx_pos    = idx_sorted[evals[idx_sorted] > 0][0]
+        A = np.linalg.solve(W, evecs[:, idx_pos])
+
+    cx = -A[1] / A[0] / 2 + x0
+    cy = -A[2] / A[0] / 2 + y0
+    r  = np.sqrt(A[1]**2 + A[2]**2 - 4 * A[0] * A[3]) / abs(A[0]) / 2
+
+    return cx, cy, r
+
+
+def fit_concentric_circles(x, y, idx_ring):
+    """
+    Fit concentric circles sharing one center in closed form, by least squares
+    on x^2 + y^2 + D x + E y + F_i = 0 with one F_i per ring.
+    """
+    num_rings = idx_ring.max() + 1
+
+    A = np.zeros((len(x), 2 + num_rings))
+    A[:, 0] = x
+    A[:, 1] = y
+    A[np.arange(len(x)), 2 + idx_ring] = 1.0
+    sol, *_ = np.linalg.lstsq(A, -(x**2 + y**2), rcond = None)
+
+    cx, cy = -sol[0] / 2, -sol[1] / 2
+    r = np.sqrt(cx**2 + cy**2 - sol[2:])
+
+    return cx, cy, r
+
+
+
+
+class AlgebraicCircleFit:
+    """
+    Fit rings without iterating over the image: extract ring peak points once
+    along radial rays, then solve for the circle in closed form.
+
+    A single ring is fitted with the `method` of choice (kasa, taubin or
+    pratt), while several rings are fitted as concentric circles sharing a
+    center.  The result can serve as the final answer or as a seed for
+    `OptimizeConcentricCircles`.
+    """
+
+    methods = { "kasa"   : fit_circle_kasa,
+                "taubin" : fit_circle_taubin,
+                "pratt"  : fit_circle_pratt, }
+
+    def __init__(self, method = "taubin", half_width = 5.0, num_theta = 360, order = 1):
+        if method not in self.methods: raise ValueError(f"Method {method} is not supported!!!  Choose from {list(self.methods)}.")
+
+        self.method     = method
+        self.half_width = half_width
+        self.num_theta  = num_theta
+        self.order      = order
+
+
+    def fit(self, img, cx, cy, r):
+        """
+        Return (cx, cy, r, cov), where r is an array with one radius per ring
+        and cov is the covariance of (cx, cy, r0, r1, ...).
+        """
+        r = np.array([r], dtype = np.float64).reshape(-1)
+
+        x, y, idx_ring = extract_ring_points(img, cx, cy, r, half_width = self.half_width,
+                                                             num_theta  = self.num_theta,
+                                                             order      = self.order)
+        if len(x) < 2 + len(r): raise ValueError("Too few ring points found to fit!!!")
+
+        if len(r) == 1:
+            cx, cy, r_fit = self.methods[self.method](x, y)
+            r = np.array([r_fit])
+        else:
+            cx, cy, r = fit_concentric_circles(x, y, idx_ring)
+
+        cov = geometric_covariance(x, y, idx_ring, cx, cy, r)
+
+        return cx, cy, r, cov
@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import lmfit
+
+
+class PointCloud:
+    """
+    Bright pixels of an image as a compact point cloud: coordinates and
+    intensities in float32.  Ring images are mostly background, so fitting
+    the cloud scales with the signal rather than the image size.
+
+    An optional bucket index sorts points into square cells of `bucket_size`
+    pixels so that points near given rings are found without a full scan.
+    """
+
+    def __init__(self, x, y, w):
+        self.x = np.asarray(x, dtype = np.float32)
+        self.y = np.asarray(y, dtype = np.float32)
+        self.w = np.asarray(w, dtype = np.float32)
+
+        self.bucket_size = None
+
+
+    @classmethod
+    def from_image(cls, img, threshold, mask = None):
+        """
+        Keep pixels above `threshold`, weighted by how far above they are.
+        Masked pixels (mask == 0) are left out.
+        """
+        is_bright = img > threshold
+        if mask is not None: is_bright &= mask > 0
+        y, x = np.nonzero(is_bright)
+
+        return cls(x, y, img[y, x] - threshold)
+
+
+    def __len__(self): return len(self.x)
+
+
+    def build_index(self, bucket_size = 32):
+        """
+        Sort points by bucket and record where each bucket starts.
+        """
+        self.bucket_size = bucket_size
+        ix = (self.x // bucket_size).astype(np.int64)
+        iy = (self.y // bucket_size).astype(np.int64)
+        self.num_buckets_x = ix.max() + 1 if len(ix) else 1
+        self.num_buckets_y = iy.max() + 1 if len(iy) else 1
+
+        idx_bucket = iy * self.num_buckets_x + ix
+        order = np.argsort(idx_bucket, kind = 'stable')
+        self.x, self.y, self.w = self.x[order], self.y[order], self.w[order]
+
+        counts = np.bincount(idx_bucket, minlength = self.num_buckets_x * self.num_buckets_y)
+        self.bucket_start = np.concatenate([ [0], np.cumsum(counts) ])
+
+        return self
+
+
+    def select_annulus(self, cx, cy, r_min, r_max):
+        """
+        Return indices of points with r_min <= distance to (cx, cy) <= r_max.
+        With a bucket index only buckets overlapping the annulus are checked.
+        """
+        if self.bucket_size is None:
+            idx = np.arange(len(self))
+        else:
+            # Distance range from the center to each bucket box...
+            b = self.bucket_size
+            y0, x0 = np.mgrid[:self.num_buckets_y, :self.num_buckets_x] * b
+            dx_near = np.maximum(np.maximum(x0 - cx, cx - (x0 + b)), 0)
+            dy_near = np.maximum(np.maximum(y0 - cy, cy - (y0 + b)), 0)
+            dx_far  = np.maximum(np.abs(x0 - cx), np.abs(x0 + b - cx))
+            dy_far  = np.maximum(np.abs(y0 - cy), np.abs(y0 + b - cy))
+            is_overlap = (np.hypot(dx_near, dy_near) <= r_max) & (np.hypot(dx_far, dy_far) >= r_min)
+
+            idx_bucket = np.flatnonzero(is_overlap.reshape(-1))
+            starts, stops = self.bucket_start[idx_bucket], self.bucket_start[idx_bucket + 1]
+            idx = np.concatenate([ np.arange(i, j) for i, j in zip(starts, stops) ] + [ np.zeros(0, dtype = np.int64) ])
+
+        d = np.hypot(self.x[idx] - cx, self.y[idx] - cy)
+
+        return idx[(d >= r_min) & (d <= r_max)]
+
+
+
+
+class OptimizeCloudConcentricCircles:
+    """
+    Fit concentric circles to a point cloud by weighted geometric distance.
+
+    Each point within `half_width` of a seed ring is assigned to the nearest
+    one, and the residual of a point is its distance to its circle scaled by
+    the square root of its weight.  No image interpolation is involved.
+    """
+
+    def __init__(self, cx, cy, r, cloud, half_width = 5.0):
+        self.cx         = cx
+        self.cy         = cy
+        self.r          = np.array([r], dtype = np.float64).reshape(-1)
+        self.cloud      = cloud
+        self.half_width = half_width
+
+        self.assign_points()
+
+        # Provide parameters for optimization...
+        self.params = self.init_params()
+        self.params.add("cx", value = cx)
+        self.params.add("cy", value = cy)
+
+        # Set up radius parameter based on number of circles...
+        for i in range(len(self.r)): self.params.add(f"r{i:d}" , value = self.r[i] )
+
+
+    def init_params(self): return lmfit.Parameters()
+
+
+    def unpack_params(self, params): return [ v.value  for _, v in params.items() ]
+
+
+    def assign_points(self):
+        """
+        Assign cloud points near the current rings to the nearest ring.
+        """
+        cloud = self.cloud
+        idx = cloud.select_annulus(self.cx, self.cy, max(self.r.min() - self.half_width, 0.0), self.r.max() + self.half_width)
+
+        d = np.hypot(cloud.x[idx] - self.cx, cloud.y[idx] - self.cy)
+        dist = np.abs(d[:, None] - self.r[None, :])
+        idx_ring = np.argmin(dist, axis = 1)
+        is_near  = dist[np.arange(len(idx)), idx_ring] <= self.half_width
+
+        # Work on the selected points in float64...
+        idx = idx[is_near]
+        self.x        = cloud.x[idx].astype(np.float64)
+        self.y        = cloud.y[idx].astype(np.float64)
+        self.sqrt_w   = np.sqrt(cloud.w[idx].astype(np.float64))
+        self.idx_ring = idx_ring[is_near]
+
+        return None
+
+
+    def residual_model(self, params, **kwargs):
+        parvals = self.unpack_params(params)
+        cx, cy  = parvals[:2]
+        r       = np.array(parvals[2:])
+
+        d = np.hypot(self.x - cx, self.y - cy)
+
+        return self.sqrt_w * (d - r[self.idx_ring])
+
+
+    def update_from_params(self, params):
+        """
+        Move the model to the given parameters and reassign points to rings.
+        """
+        parvals = self.unpack_params(params)
+        self.cx, self.cy = parvals[:2]
+        self.r = np.array(parvals[2:])
+        self.assign_points()
+        self.params = params
+
+        return None
+
+
+    def fit(self, num_rounds = 2, **kwargs):
+        """
+        Fit the cloud, reassigning points to rings between rounds, and leave
+        the model at the best fit.
+        """
+        print(f"___/ Fitting \___")
+        for i in range(num_rounds):
+            if i > 0: self.update_from_params(res.params)
+
+            if len(self.x) < len(self.params): raise ValueError("Too few points near the rings to fit!!!")
+
+            res = lmfit.minimize( self.residual_model,
+                                  self.params,
+                                  method     = 'leastsq',
+                                  nan_policy = 'omit',
+                                  **kwargs )
+
+        self.update_from_params(res.params)
+
+        return res
+
+
+    def report_fit(self, res):
+        lmfit.report_fit(res)
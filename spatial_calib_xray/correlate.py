@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from .model import OptimizeConcentricCircles
+
+
+def downsample(img, bin_size):
+    """
+    Average over bin_size x bin_size blocks, dropping any remainder.
+    """
+    if bin_size == 1: return img
+
+    size_y, size_x = img.shape[0] // bin_size, img.shape[1] // bin_size
+    img = img[:size_y * bin_size, :size_x * bin_size]
+
+    return img.reshape(size_y, bin_size, size_x, bin_size).mean(axis = (1, 3))
+
+
+def hann_window(shape):
+    """
+    2D Hann window, which tapers the image edges to suppress the spurious
+    correlation from the wrap-around of the FFT.
+    """
+    return np.outer(np.hanning(shape[0]), np.hanning(shape[1]))
+
+
+def interpolate_peak(corr):
+    """
+    Locate the peak of a circular correlation with sub-pixel accuracy by
+    fitting a parabola through the peak and its neighbors along each axis.
+    Return the signed (dy, dx) of the peak, wrapped to [-N/2, N/2).
+    """
+    idx_peak = np.unravel_index(np.argmax(corr), corr.shape)
+
+    shift = []
+    for axis, (i, n) in enumerate(zip(idx_peak, corr.shape)):
+        # Neighbors wrap around as the correlation is circular...
+        idx_lo, idx_hi = list(idx_peak), list(idx_peak)
+        idx_lo[axis], idx_hi[axis] = (i - 1) % n, (i + 1) % n
+        v_lo, v_0, v_hi = corr[tuple(idx_lo)], corr[idx_peak], corr[tuple(idx_hi)]
+
+        denom = v_lo - 2 * v_0 + v_hi
+        delta = 0.5 * (v_lo - v_hi) / denom if denom != 0 else 0.0
+
+        s = i + delta
+        if s >= n / 2: s -= n
+        shift.append(s)
+
+    return tuple(shift)
+
+
+
+
+class PhaseCorrelation:
+    """
+    Estimate the translation of an image with respect to a reference image by
+    FFT phase correlation.
+
+    Both images are downsampled by `bin_size` and windowed before the FFT,
+    and the spectrum of the reference is computed once and cached, so each
+    estimate costs one forward and one inverse FFT of the small image.
+    """
+
+    def __init__(self, img_ref, bin_size = 4, is_window = True):
+        self.bin_size  = bin_size
+        self.is_window = is_window
+        self.window    = None
+
+        img_ref = self.prepare(img_ref)
+        self.shape   = img_ref.shape
+        self.fft_ref = np.fft.rfft2(img_ref)
+
+
+    def prepare(self, img):
+        img = downsample(np.asarray(img, dtype = np.float64), self.bin_size)
+        img = img - img.mean()
+
+        if self.is_window:
+            if self.window is None or self.window.shape != img.shape: self.window = hann_window(img.shape)
+            img = img * self.window
+
+        return img
+
+
+    def estimate(self, img):
+        """
+        Return the shift (dy, dx) in full-resolution pixels that moves the
+        reference onto `img`.
+        """
+        img = self.prepare(img)
+        if img.shape != self.shape: raise ValueError(f"Image shape {img.shape} differs from reference shape {self.shape} after downsampling!!!")
+
+        # Keep only the phase of the cross-power spectrum...
+        cross  = np.fft.rfft2(img) * np.conj(self.fft_ref)
+        cross /= np.maximum(np.abs(cross), np.finfo(np.float64).tiny)
+        corr   = np.fft.irfft2(cross, s = img.shape)
+
+        dy, dx = interpolate_peak(corr)
+
+        return dy * self.bin_size, dx * self.bin_size
+
+
+
+
+class FriedelCenter:
+    """
+    Find the beam center in one shot from the centrosymmetry of powder rings.
+
+    An image symmetric about c matches its point reflection shifted by
+    2c - (N - 1) along each axis, so the peak of the cross-correlation of the
+    image with its 180-degree rotated copy gives the center directly.  The
+    correlation is zero-padded to avoid wrap-around, computed on an image
+    downsampled by `bin_size`, and refined to sub-pixel accuracy.
+
+    Masked pixels (mask == 0) are left out, and the correlation is divided by
+    the number of valid pixel pairs at each shift.  Shifts with fewer pairs
+    than `min_overlap` of the valid pixels are ignored.  Quantities depending
+    only on the mask are cached.
+    """
+
+    def __init__(self, mask = None, bin_size = 4, min_overlap = 0.25):
+        self.mask        = mask
+        self.bin_size    = bin_size
+        self.min_overlap = min_overlap
+
+        self.shape   = None
+        self.overlap = None    # Number of valid pixel pairs per shift
+
+
+    def prepare_mask(self, shape):
+        """
+        Downsample the mask, keeping only blocks that are fully valid, and
+        count valid pixel pairs for every shift.
+        """
+        if self.mask is None:
+            mask = np.ones(shape, dtype = np.float64)
+        else:
+            mask = downsample(np.asarray(self.mask, dtype = np.float64), self.bin_size)
+            mask = (mask == 1.0).astype(np.float64)
+
+        self.shape     = shape
+        self.mask_ds   = mask
+        self.shape_fft = (2 * shape[0], 2 * shape[1])
+        overlap = np.fft.irfft2(np.fft.rfft2(mask, s = self.shape_fft) * np.conj(np.fft.rfft2(mask[::-1, ::-1], s = self.shape_fft)), s = self.shape_fft)
+        self.overlap = np.round(overlap)
+
+        return None
+
+
+    def find(self, img):
+        """
+        Return the center (cx, cy) in full-resolution pixels.
+        """
+        img = downsample(np.asarray(img, dtype = np.float64), self.bin_size)
+        if self.shape != img.shape: self.prepare_mask(img.shape)
+
+        # Subtract the mean of valid pixels and zero out the rest...
+        mask = self.mask_ds
+        img  = (img - img[mask > 0].mean()) * mask
+
+        # Correlate with the point reflection...
+        corr = np.fft.irfft2(np.fft.rfft2(img, s = self.shape_fft) * np.conj(np.fft.rfft2(img[::-1, ::-1], s = self.shape_fft)), s = self.shape_fft)
+        is_valid = self.overlap >= self.min_overlap * mask.sum()
+        corr = np.where(is_valid, corr / np.maximum(self.overlap, 1.0), corr[is_valid].min())
+
+        dy, dx = interpolate_peak(corr)
+
+        # Convert the shift to the center of the downsampled and then the full image...
+        cy = (dy + self.shape[0] - 1) / 2
+        cx = (dx + self.shape[1] - 1) / 2
+        b  = self.bin_size
+
+        return cx * b + (b - 1) / 2, cy * b + (b - 1) / 2
+
+
+
+
+def update_calibration(img, phase_corr, cx, cy, r, num = 100, max_nfev = 50, **kwargs):
+    """
+    Move a known calibration (cx, cy, r) by the shift of `img` with respect
+    to the reference of `phase_corr`, then polish it with a short fit.
+
+    Return the model and the fit result.
+    """
+    dy, dx = phase_corr.estimate(img)
+
+    model = OptimizeConcentricCircles(cx = cx + dx, cy = cy + dy, r = np.array([r]).reshape(-1), num = num)
+    res   = model.fit(img, max_nfev = max_nfev, **kwargs)
+
+    return model, res
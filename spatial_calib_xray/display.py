@@ -3,6 +3,9 @@
 
 import numpy as np
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from scipy.ndimage import spline_filter
 import matplotlib              as mpl
 import matplotlib.pyplot       as plt
 import matplotlib.colors       as mcolors
@@ -10,12 +13,150 @@ import matplotlib.patches      as mpatches
 import matplotlib.transforms   as mtransforms
 import matplotlib.font_manager as font_manager
 
+from .model import OptimizeCircleModel, generate_circle_crds
+
+
+def load_font(path_font):
+    """
+    Return the font properties of a font file, registering it with
+    matplotlib, or of the default font if the file is missing.
+    """
+    if not os.path.exists(path_font):
+        print(f"Font {path_font} is not found, the default font is used.")
+        return font_manager.FontProperties()
+
+    font_manager.fontManager.addfont(path_font)
+
+    return font_manager.FontProperties(fname = path_font)
+
+
+
+
+class ImagePyramid:
+    """
+    Levels of detail of an image for fast display.
+
+    The image is normalized once to uint8, and each level halves the one
+    below by keeping, in every 2x2 block, the value farthest from the middle
+    of the colormap, so thin bright rings and dark gaps survive downsampling.
+    The level rendered matches the screen resolution of the axes, and is
+    swapped when the axes are zoomed or panned.  Every level is drawn with
+    the extent of the full image, so data coordinates, e.g. from mouse
+    clicks, stay in full resolution pixels.
+    """
+
+    def __init__(self, img, norm, cmap = 'gray', min_size = 256):
+        self.img   = img
+        self.norm  = norm
+        self.cmap  = cmap
+        self.shape = img.shape
+
+        # Normalize once, so rendering needs no float conversion...
+        level = np.clip(np.nan_to_num(np.ma.filled(norm(np.asarray(img, dtype = np.float64)), np.nan)), 0.0, 1.0)
+        level = np.round(level * 255).astype(np.uint8)
+
+        self.levels = [ level ]
+        while max(level.shape) > min_size:
+            # Pad to even size by repeating the edge...
+            h, w  = level.shape
+            level = np.pad(level, ((0, h % 2), (0, w % 2)), mode = 'edge')
+            block = level.reshape(level.shape[0] // 2, 2, level.shape[1] // 2, 2)
+            v_max = block.max(axis = (1, 3))
+            v_min = block.min(axis = (1, 3))
+
+            # Keep the extreme farther from the middle value 127.5...
+            level = np.where(v_max.astype(np.int16) + v_min >= 255, v_max, v_min)
+            self.levels.append(level)
+
+        self.ax     = None
+        self.im     = None
+        self.idx_lv = None
+
+
+    def choose_level(self, ax):
+        """
+        Return the coarsest level with at least one image pixel per screen
+        pixel in the current view.  The original axes box is used, because
+        the box shrunk to keep the aspect ratio is stale while limits change.
+        """
+        bbox = ax.get_position(original = True).transformed(ax.figure.transFigure)
+        x0, x1 = ax.get_xlim()
+        y0, y1 = ax.get_ylim()
+        ratio  = max(abs(x1 - x0) / max(bbox.width, 1), abs(y1 - y0) / max(bbox.height, 1))
+
+        idx_lv = int(np.floor(np.log2(ratio))) if ratio > 1 else 0
+
+        return min(idx_lv, len(self.levels) - 1)
+
+
+    def get_extent(self, idx_lv):
+        """
+        Extent of a level in full resolution pixels.
+        """
+        scale = 2 ** idx_lv
+        h, w  = self.levels[idx_lv].shape
+
+        return (-0.5, w * scale - 0.5, h * scale - 0.5, -0.5)
+
+
+    def render(self, ax, zorder = 1):
+        """
+        Draw the image in `ax` and follow its zoom from now on.  Return the
+        image artist.
+        """
+        self.ax = ax
+
+        # Set the view of the full image first, so the level fits it...
+        ax.set_xlim(-0.5, self.shape[1] - 0.5)
+        ax.set_ylim(self.shape[0] - 0.5, -0.5)
+        self.idx_lv = self.choose_level(ax)
+
+        self.im = ax.imshow( self.levels[self.idx_lv],
+                             cmap          = self.cmap,
+                             vmin          = 0,
+                             vmax          = 255,
+                             extent        = self.get_extent(self.idx_lv),
+                             interpolation = 'nearest',
+                             zorder        = zorder, )
+        ax.set_xlim(-0.5, self.shape[1] - 0.5)
+        ax.set_ylim(self.shape[0] - 0.5, -0.5)
+
+        ax.callbacks.connect('xlim_changed', self.update_level)
+        ax.callbacks.connect('ylim_changed', self.update_level)
+
+        return self.im
+
+
+    def update_level(self, ax):
+        """
+        Swap in the level matching the new view, if it changed.
+        """
+        idx_lv = self.choose_level(ax)
+        if idx_lv == self.idx_lv: return None
+
+        self.idx_lv = idx_lv
+        self.im.set_data(self.levels[idx_lv])
+        self.im.set_extent(self.get_extent(idx_lv))
+        ax.figure.canvas.draw_idle()
+
+        return None
+
+
+
 
 class Display():
+    """
+    A display session: the figure, image and colorbar are created once and
+    kept open, and circles are overlays updated in place by blitting, so
+    selecting several rings or showing refits redraws no image.  Call
+    `close` to end the session.
+    """
+
     def __init__(self, img, figsize, **kwargs):
         self.img = img
         self.figsize = figsize
         self.crds_mouse = []
+        self.fig = None
         for k, v in kwargs.items(): setattr(self, k, v)
 
         ## self.config_fonts()
@@ -28,11 +169,9 @@ class Display():
         drc_font  = os.path.join("fonts", "Helvetica")
         fl_ttf    = f"Helvetica.ttf"
         path_font = os.path.join(drc_py, drc_font, fl_ttf)
-        prop_font = font_manager.FontProperties( fname = path_font )
 
         # Add Font and configure font properties
-        font_manager.fontManager.addfont(path_font)
-        prop_font = font_manager.FontProperties(fname = path_font)
+        prop_font = load_font(path_font)
         self.prop_font = prop_font
 
         # Specify fonts for pyplot...
@@ -52,189 +191,409 @@ class Display():
         return fig, (ax_img, ax_bar_img, )
 
 
+    def open(self):
+        """
+        Create the figure with the image and colorbar, unless the session's
+        figure is still open.
+        """
+        if self.fig is not None and plt.fignum_exists(self.fig.number): return None
+
+        self.fig, (self.ax_img, self.ax_bar_img, ) = self.create_panels()
+        self.plot_img()
+
+        self.overlays     = {}
+        self.background   = None
+        self.is_selecting = False
+        self.drag         = None
+
+        canvas = self.fig.canvas
+        canvas.mpl_connect('draw_event'          , self.on_draw)
+        canvas.mpl_connect('button_press_event'  , self.save_mouse_crds)
+        canvas.mpl_connect('button_press_event'  , self.on_press)
+        canvas.mpl_connect('motion_notify_event' , self.on_motion)
+        canvas.mpl_connect('button_release_event', self.on_release)
+        canvas.mpl_connect('key_press_event'     , self.on_key)
+        canvas.mpl_connect('close_event'         , self.on_close)
+
+        return None
+
+
+    def close(self):
+        """
+        End the session.
+        """
+        if self.fig is not None: plt.close(self.fig)
+        self.fig = None
+
+
     def plot_img(self, title = ""): 
-        img = self.img
-        im = self.ax_img.imshow(img, norm = self.divnorm, zorder = 1)
-        ## im.set_cmap('seismic')
-        im.set_cmap('gray')
-        plt.colorbar(im, cax = self.ax_bar_img, orientation="horizontal", pad = 0.05)
+        # Build levels of detail once per image and color scale...
+        if self.pyramid is None or self.pyramid.img is not self.img:
+            self.pyramid = ImagePyramid(self.img, self.divnorm, cmap = 'gray')
+        self.pyramid.render(self.ax_img, zorder = 1)
 
+        # The colorbar shows the data values rather than the uint8 levels...
+        sm = mpl.cm.ScalarMappable(norm = self.divnorm, cmap = 'gray')
+        plt.colorbar(sm, cax = self.ax_bar_img, orientation="horizontal", pad = 0.05)
 
-    def plot_circle(self, crds, color = 'yellow', zorder = 2, label = ''):
+
+    def plot_circle(self, crds, color = 'yellow', zorder = 2, label = '', key = None):
+        """
+        Draw a circle overlay, or move the overlay under the same `key`
+        (the label by default) to the new crds.
+        """
         x = crds[1]
         y = crds[0]
-        self.ax_img.plot(x, y, zorder = zorder, c = color, alpha = 1, linewidth = 2, label = label)
+        key = label if key is None else key
+
+        if key in self.overlays:
+            line = self.overlays[key]
+            line.set_data(x, y)
+            line.set_color(color)
+            line.set_zorder(zorder)
+        else:
+            # Overlays are animated, i.e. left out of full draws and blitted...
+            line, = self.ax_img.plot(x, y, zorder = zorder, c = color, alpha = 1, linewidth = 2, label = label, animated = True)
+            self.overlays[key] = line
+
+        return line
+
+
+    def update_circles(self, circles):
+        """
+        Set the circle overlays to `circles`, a list of
+        (key, crds, color, zorder, label), and remove all others.  Nothing
+        is drawn once the window is closed.
+        """
+        if self.fig is None: return None
+
+        keys_old = set(self.overlays)
+        for key, crds, color, zorder, label in circles:
+            self.plot_circle(crds, color = color, zorder = zorder, label = label, key = key)
+
+        keys_new = { key for key, *_ in circles }
+        for key in keys_old - keys_new: self.overlays.pop(key).remove()
+
+        # New or removed lines change the legend, which needs a full draw...
+        if keys_new != keys_old:
+            if keys_new                      : self.ax_img.legend(loc=(1.04,0))
+            elif self.ax_img.get_legend()    : self.ax_img.get_legend().remove()
+            self.fig.canvas.draw_idle()
+        else:
+            self.blit()
+
+        return None
+
+
+    def on_draw(self, event):
+        """
+        Keep the freshly drawn figure without overlays as the background to
+        blit over, then draw the overlays on top.
+        """
+        canvas = event.canvas
+        if canvas.supports_blit: self.background = canvas.copy_from_bbox(self.fig.bbox)
+        for line in self.overlays.values():
+            if line.get_animated(): line.draw(event.renderer)
+
+
+    def blit(self):
+        """
+        Redraw the overlays only.
+        """
+        if self.fig is None: return None
+
+        canvas = self.fig.canvas
+        if self.background is None:
+            canvas.draw_idle()
+            return None
+
+        canvas.restore_region(self.background)
+        for line in self.overlays.values(): self.ax_img.draw_artist(line)
+        canvas.blit(self.fig.bbox)
+        canvas.flush_events()
+
+        return None
 
 
     def config_colorbar(self, vmin = -1, vcenter = 0, vmax = 1):
         # Plot image...
         self.divnorm = mcolors.TwoSlopeNorm(vcenter = vcenter, vmin = vmin, vmax = vmax)
+        self.pyramid = None
+
+        # The image of an open session is drawn with the old color scale...
+        self.close()
 
 
     def save_mouse_crds(self, event):
+        if not self.is_selecting or event.inaxes is not self.ax_img: return None
+
+        # Clicks for zooming or panning are not selections...
+        toolbar = self.fig.canvas.toolbar
+        if toolbar is not None and toolbar.mode: return None
+
         print( f"{event.xdata}, {event.ydata}" )
         self.crds_mouse.append( (event.xdata, event.ydata) )
 
         if len(self.crds_mouse) > 2: 
-            ## self.fig.canvas.mpl_disconnect(self.cid)
-            plt.close()
+            self.is_selecting = False
+            self.fig.canvas.stop_event_loop()
 
 
-    def select_circle(self, title = '', is_save = False): 
-        self.fig, (self.ax_img, self.ax_bar_img, ) = self.create_panels()
+    def on_key(self, event):
+        if not self.is_selecting: self.fig.canvas.stop_event_loop()
 
-        self.plot_img()
 
-        self.crds_mouse = []
-        self.cid = self.fig.canvas.mpl_connect('button_press_event', self.save_mouse_crds)
+    def on_close(self, event):
+        self.is_selecting = False
+        self.fig.canvas.stop_event_loop()
+        self.fig = None
 
-        plt.show()
 
+    def wait(self):
+        """
+        Show the figure and handle events until three points are selected,
+        a key is pressed or the window is closed.  Return at once on a
+        non-interactive backend such as Agg, which has no GUI event loop to
+        run, as plt.show does.
+        """
+        canvas = self.fig.canvas
+        if canvas.required_interactive_framework is None: return None
 
-    def show(self, crds_init, crds, title = '', is_save = False): 
-        self.fig, (self.ax_img, self.ax_bar_img, ) = self.create_panels()
+        plt.show(block = False)
+        canvas.start_event_loop()
 
-        self.plot_img()
-        self.plot_circle(crds_init, color = 'blue', zorder = 2, label = 'init')
-        self.plot_circle(crds     , color = 'red', zorder = 3, label = 'final')
-        self.ax_img.legend(loc=(1.04,0))
+
+    def select_circle(self, title = '', is_save = False): 
+        self.open()
+        self.update_circles([])
+
+        self.crds_mouse = []
+        self.is_selecting = True
+        self.wait()
+
+
+    def show(self, crds_init, crds, title = '', is_save = False): 
+        self.open()
+        self.update_circles([ ('init' , crds_init, 'blue', 2, 'init' ),
+                              ('final', crds     , 'red' , 3, 'final'), ])
 
         if not is_save: 
-            plt.show()
+            self.wait()
         else:
-            # Set up drc...
-            DRCPDF         = "pdfs"
-            drc_cwd        = os.getcwd()
-            prefixpath_pdf = os.path.join(drc_cwd, DRCPDF)
-            if not os.path.exists(prefixpath_pdf): os.makedirs(prefixpath_pdf)
+            self.save_pdf(title)
+
+
+    def refine_circle(self, cx, cy, r, num = 1000, num_drag = 100, half_width = 10, max_nfev_drag = 50):
+        """
+        Refine a circle by dragging its center or radius handle, while the
+        fitted circle follows live.  Return the last polished (cx, cy, r),
+        once a key is pressed or the window is closed.
+
+        Every mouse motion refits with `num_drag` samples and bilinear
+        interpolation on the image cropped to the annulus within
+        `half_width` of the guess, on a worker thread.  A refit that is not
+        running yet is cancelled by the next motion, and the result of a
+        superseded one is dropped.  Releasing the mouse polishes the fit with
+        `num` samples and cubic interpolation from spline coefficients
+        computed once.
+        """
+        self.open()
+        self.drag = { "cx"         : cx,
+                      "cy"         : cy,
+                      "r"          : r,
+                      "num"        : num,
+                      "num_drag"   : num_drag,
+                      "half_width" : half_width,
+                      "max_nfev"   : max_nfev_drag,
+                      "handle"     : None,
+                      "request"    : 0,
+                      "done"       : 0,
+                      "shown"      : 0,
+                      "result"     : None,
+                      "polished"   : None,
+                      "future"     : None,
+                      "coeffs"     : None,
+                      "lock"       : threading.Lock(), }
+        self.update_drag_overlays()
+
+        # Fit on a worker, and pick up results on the GUI thread...
+        self.executor = ThreadPoolExecutor(max_workers = 1)
+        self.timer = self.fig.canvas.new_timer(interval = 20)
+        self.timer.add_callback(self.apply_refit)
+        self.timer.start()
+
+        self.submit_refit(is_polish = True)
+        self.wait()
+
+        self.timer.stop()
+        self.executor.shutdown(wait = True)
+        self.apply_refit()
+        polished, self.drag = self.drag["polished"], None
+
+        return polished
+
+
+    def update_drag_overlays(self):
+        drag = self.drag
+        cx, cy, r = drag["cx"], drag["cy"], drag["r"]
+        circles = [ ('guess'        , generate_circle_crds(cx, cy, r, drag["num_drag"]), 'yellow', 2, 'guess'),
+                    ('handle_center', np.array([[cy], [cx]])                           , 'yellow', 4, None   ),
+                    ('handle_radius', np.array([[cy], [cx + r]])                       , 'yellow', 4, None   ), ]
+        if drag["result"] is not None:
+            circles.append(('fit', generate_circle_crds(*drag["result"], drag["num_drag"]), 'red', 3, 'fit'))
+
+        is_new = 'handle_center' not in self.overlays
+        self.update_circles(circles)
+        if is_new:
+            for key in ('handle_center', 'handle_radius'): self.overlays[key].set_marker('o')
 
-            # Specify file...
-            fl_pdf = f"{title}.pdf"
-            path_pdf = os.path.join(prefixpath_pdf, fl_pdf)
+        return None
 
-            # Export...
-            ## plt.savefig(path_pdf, dpi = 100, bbox_inches='tight', pad_inches = 0)
-            plt.savefig(path_pdf, dpi = 100, transparent=True)
 
-        plt.close('all')
+    def on_press(self, event):
+        if self.drag is None or event.inaxes is not self.ax_img: return None
 
+        toolbar = self.fig.canvas.toolbar
+        if toolbar is not None and toolbar.mode: return None
 
+        # Grab a handle within 10 screen pixels...
+        for handle in ('center', 'radius'):
+            x, y = self.overlays[f'handle_{handle}'].get_xydata()[0]
+            x, y = self.ax_img.transData.transform((x, y))
+            if np.hypot(x - event.x, y - event.y) < 10:
+                self.drag["handle"] = handle
+                break
 
 
-class DisplayConcentricCircles():
-    def __init__(self, img, figsize, **kwargs):
-        self.img = img
-        self.figsize = figsize
-        self.crds_mouse = []
-        for k, v in kwargs.items(): setattr(self, k, v)
+    def on_motion(self, event):
+        if self.drag is None or self.drag["handle"] is None or event.inaxes is not self.ax_img: return None
 
-        self.config_fonts()
-        self.config_colorbar()
+        drag = self.drag
+        if drag["handle"] == 'center':
+            drag["cx"], drag["cy"] = event.xdata, event.ydata
+        else:
+            drag["r"] = max(np.hypot(event.xdata - drag["cx"], event.ydata - drag["cy"]), 1.0)
 
+        self.update_drag_overlays()
+        self.submit_refit(is_polish = False)
 
-    def config_fonts(self):
-        # Where to load external font...
-        drc_py    = os.getcwd()
-        drc_font  = os.path.join("fonts", "Helvetica")
-        fl_ttf    = f"Helvetica.ttf"
-        path_font = os.path.join(drc_py, drc_font, fl_ttf)
-        prop_font = font_manager.FontProperties( fname = path_font )
 
-        # Add Font and configure font properties
-        font_manager.fontManager.addfont(path_font)
-        prop_font = font_manager.FontProperties(fname = path_font)
-        self.prop_font = prop_font
+    def on_release(self, event):
+        if self.drag is None or self.drag["handle"] is None: return None
 
-        # Specify fonts for pyplot...
-        plt.rcParams['font.family'] = prop_font.get_name()
-        plt.rcParams['font.size']   = 18
+        self.drag["handle"] = None
+        self.submit_refit(is_polish = True)
 
-        return None
 
+    def submit_refit(self, is_polish):
+        drag = self.drag
+        with drag["lock"]:
+            drag["request"] += 1
+            request = drag["request"]
+        if drag["future"] is not None: drag["future"].cancel()
 
-    def create_panels(self):
-        nrows, ncols = 2, 1
-        fig = plt.figure(figsize = self.figsize)
-        gspec =  fig.add_gridspec(nrows, ncols, height_ratios = [1, 1/20])
-        ax_img  = fig.add_subplot(gspec[0,0], aspect = 1)
-        ax_bar_img  = fig.add_subplot(gspec[1,0], aspect = 1/20)
+        guess = (drag["cx"], drag["cy"], drag["r"])
+        drag["future"] = self.executor.submit(self.refit, drag, request, guess, is_polish)
 
-        return fig, (ax_img, ax_bar_img, )
 
+    def refit(self, drag, request, guess, is_polish):
+        """
+        Fit a circle from the guess on the worker thread, unless a newer
+        request came in.
+        """
+        if request != drag["request"]: return None
 
-    def plot_img(self, title = ""): 
-        img = self.img
-        im = self.ax_img.imshow(img, norm = self.divnorm, zorder = 1)
-        ## im.set_cmap('seismic')
-        im.set_cmap('gray')
-        plt.colorbar(im, cax = self.ax_bar_img, orientation="horizontal", pad = 0.05)
+        cx, cy, r = guess
+        if is_polish:
+            if drag["coeffs"] is None: drag["coeffs"] = spline_filter(self.img, order = 3, output = np.float64, mode = 'constant')
+            model = OptimizeCircleModel(cx, cy, r, drag["num"])
+            res   = model.solve(self.img, order = 3, coeffs = drag["coeffs"])
+            cx, cy, r = model.unpack_params(res.params)
+        else:
+            # Crop to the annulus, which makes the peak value cheap...
+            pad    = r + drag["half_width"]
+            y0, x0 = max(int(cy - pad), 0), max(int(cx - pad), 0)
+            y1, x1 = int(cy + pad) + 2, int(cx + pad) + 2
+            model  = OptimizeCircleModel(cx - x0, cy - y0, r, drag["num_drag"])
+            res    = model.solve(self.img[y0:y1, x0:x1], order = 1, max_nfev = drag["max_nfev"])
+            cx, cy, r = model.unpack_params(res.params)
+            cx, cy = cx + x0, cy + y0
+
+        # Publish only if no newer request came in meanwhile...
+        with drag["lock"]:
+            if request != drag["request"]: return None
+            drag["result"] = (cx, cy, r)
+            drag["done"]   = request
+            if is_polish: drag["polished"] = (cx, cy, r)
 
+        return None
 
-    def plot_circle(self, crds, color = 'yellow', zorder = 2, label = ''):
-        x = crds[1]
-        y = crds[0]
-        self.ax_img.plot(x, y, zorder = zorder, c = color, alpha = 1, linewidth = 2, label = label)
 
+    def apply_refit(self):
+        """
+        Show the latest refit, if it has not been shown yet.
+        """
+        drag = self.drag
+        if drag is None: return None
 
-    def config_colorbar(self, vmin = -1, vcenter = 0, vmax = 1):
-        # Plot image...
-        self.divnorm = mcolors.TwoSlopeNorm(vcenter = vcenter, vmin = vmin, vmax = vmax)
+        with drag["lock"]:
+            if drag["done"] == drag["shown"]: return None
+            drag["shown"] = drag["done"]
+            result, is_polished = drag["result"], drag["polished"] == drag["result"]
 
+        if is_polished: print(f"{result[0]}, {result[1]}, {result[2]}")
+        self.update_drag_overlays()
 
-    def save_mouse_crds(self, event):
-        print( f"{event.xdata}, {event.ydata}" )
-        self.crds_mouse.append( (event.xdata, event.ydata) )
 
-        if len(self.crds_mouse) > 2: 
-            ## self.fig.canvas.mpl_disconnect(self.cid)
-            plt.close()
+    def save_pdf(self, title):
+        # Set up drc...
+        DRCPDF         = "pdfs"
+        drc_cwd        = os.getcwd()
+        prefixpath_pdf = os.path.join(drc_cwd, DRCPDF)
+        if not os.path.exists(prefixpath_pdf): os.makedirs(prefixpath_pdf)
 
+        # Specify file...
+        fl_pdf = f"{title}.pdf"
+        path_pdf = os.path.join(prefixpath_pdf, fl_pdf)
 
-    def select_circle(self, title = '', is_save = False): 
-        self.fig, (self.ax_img, self.ax_bar_img, ) = self.create_panels()
+        # Export with overlays, which full draws skip while animated...
+        for line in self.overlays.values(): line.set_animated(False)
+        ## plt.savefig(path_pdf, dpi = 100, bbox_inches='tight', pad_inches = 0)
+        self.fig.savefig(path_pdf, dpi = 100, transparent=True)
+        for line in self.overlays.values(): line.set_animated(True)
 
-        self.plot_img()
+        return None
 
-        self.crds_mouse = []
-        self.cid = self.fig.canvas.mpl_connect('button_press_event', self.save_mouse_crds)
 
-        plt.show()
+
+
+class DisplayConcentricCircles(Display):
+    def __init__(self, img, figsize, **kwargs):
+        super().__init__(img, figsize, **kwargs)
+
+        self.config_fonts()
 
 
     def show(self, crds_init, crds, title = '', is_save = False): 
-        self.fig, (self.ax_img, self.ax_bar_img, ) = self.create_panels()
+        self.open()
 
-        self.plot_img()
+        circles = []
         for i in range(crds_init.shape[1]):
             label = 'init' if i < 1 else None
-            self.plot_circle(crds_init[:, i, :], color = 'blue', zorder = 2, label = label)
+            circles.append((f'init{i}', crds_init[:, i, :], 'blue', 2, label))
 
             label = 'final' if i < 1 else None
-            self.plot_circle(crds[:, i, :]     , color = 'red' , zorder = 3, label = label)
-            #                     ^  ^  ^
-            # (x, y) _____________|  :  |
-            #                        :  |
-            # num of circles ........:  |
-            #                           |
-            # num of sample points _____|
+            circles.append((f'final{i}', crds[:, i, :]    , 'red' , 3, label))
+            #                                ^  ^  ^
+            # (x, y) ________________________|  :  |
+            #                                   :  |
+            # num of circles ...................:  |
+            #                                      |
+            # num of sample points ________________|
 
-        self.ax_img.legend(loc=(1.04,0))
+        self.update_circles(circles)
 
         if not is_save: 
-            plt.show()
+            self.wait()
         else:
-            # Set up drc...
-            DRCPDF         = "pdfs"
-            drc_cwd        = os.getcwd()
-            prefixpath_pdf = os.path.join(drc_cwd, DRCPDF)
-            if not os.path.exists(prefixpath_pdf): os.makedirs(prefixpath_pdf)
-
-            # Specify file...
-            fl_pdf = f"{title}.pdf"
-            path_pdf = os.path.join(prefixpath_pdf, fl_pdf)
-
-            # Export...
-            ## plt.savefig(path_pdf, dpi = 100, bbox_inches='tight', pad_inches = 0)
-            plt.savefig(path_pdf, dpi = 100, transparent=True)
-
-        plt.close('all')
+            self.save_pdf(title)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from .model import OptimizeConcentricCircles
+from .pool  import MaxPool, pool_frames
+
+
+class DriftTracker:
+    """
+    Track the beam center across a run by pooling the event stream in chunks
+    of `chunk_size` events and fitting each chunk's image starting from the
+    parameters of the previous chunk.
+
+    Fits run on a worker thread, so pooling the next chunk overlaps with
+    fitting the current one.  Chunks are fitted in order, which keeps the
+    warm start chain intact.
+    """
+
+    def __init__(self, cx, cy, r, num = 100, chunk_size = 1000, make_pool = MaxPool, **kwargs):
+        self.cx         = cx
+        self.cy         = cy
+        self.r          = np.array([r], dtype = np.float64).reshape(-1)
+        self.num        = num
+        self.chunk_size = chunk_size
+        self.make_pool  = make_pool
+        self.kwargs     = kwargs    # Passed on to fit
+
+        self.dtype = [ ("event_start", np.int64),
+                       ("event_stop" , np.int64),
+                       ("num_frames" , np.int64),
+                       ("cx"         , np.float64),
+                       ("cy"         , np.float64),
+                       ("r"          , np.float64, (len(self.r), )),
+                       ("cx_err"     , np.float64),
+                       ("cy_err"     , np.float64),
+                       ("r_err"      , np.float64, (len(self.r), )), ]
+
+
+    def fit_chunk(self, img, event_start, event_stop, num_frames):
+        """
+        Fit one pooled chunk and return its row of the drift record.
+        """
+        # Normalize image...
+        img = (img - np.mean(img)) / np.std(img)
+
+        model = OptimizeConcentricCircles(cx = self.cx, cy = self.cy, r = self.r, num = self.num)
+        res   = model.fit(img, **self.kwargs)
+
+        # Warm start the next chunk...
+        parvals = model.unpack_params(res.params)
+        self.cx, self.cy = parvals[:2]
+        self.r = np.array(parvals[2:])
+
+        # Standard errors are None when lmfit cannot estimate them...
+        stderrs = [ np.nan if v.stderr is None else v.stderr for _, v in res.params.items() ]
+
+        return (event_start, event_stop, num_frames, self.cx, self.cy, self.r, *stderrs[:2], stderrs[2:])
+
+
+    def run(self, read_frame, event_nums, accept_frame = None):
+        """
+        Return the drift record over `event_nums` as a structured array with
+        one row per chunk.  Event ranges are given by the first and the last
+        event number of each chunk.
+        """
+        event_nums = list(event_nums)
+        chunks = [ event_nums[i:i + self.chunk_size] for i in range(0, len(event_nums), self.chunk_size) ]
+
+        futures = []
+        with ThreadPoolExecutor(max_workers = 1) as executor:
+            for chunk in chunks:
+                pool = pool_frames(read_frame, chunk, self.make_pool(), accept_frame = accept_frame)
+                if pool.count == 0: continue
+
+                futures.append(executor.submit(self.fit_chunk, pool.result(), chunk[0], chunk[-1], pool.count))
+
+            record = [ f.result() for f in futures ]
+
+        return np.array(record, dtype = self.dtype)
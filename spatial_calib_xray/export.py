@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import numpy as np
+import matplotlib              as mpl
+import matplotlib.colors       as mcolors
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from .display import ImagePyramid, load_font
+from .model   import generate_circle_crds
+
+
+# Downsampled images and font of a worker, set once by init_worker...
+worker_state = {}
+
+
+def init_worker(levels, extents, path_font):
+    worker_state["levels"]    = levels
+    worker_state["extents"]   = extents
+    worker_state["prop_font"] = load_font(path_font) if path_font is not None else None
+
+
+def render_figure(path, idx_img, cx, cy, r, title, norm, figsize, dpi, num):
+    """
+    Render one calibration summary with Agg and no pyplot: the image, the
+    fitted circles and the fit values in the title.
+    """
+    level  = worker_state["levels"][idx_img]
+    extent = worker_state["extents"][idx_img]
+    prop_font = worker_state["prop_font"]
+
+    fig = Figure(figsize = figsize)
+    FigureCanvasAgg(fig)
+    gspec =  fig.add_gridspec(2, 1, height_ratios = [1, 1/20])
+    ax_img  = fig.add_subplot(gspec[0,0], aspect = 1)
+    ax_bar_img  = fig.add_subplot(gspec[1,0], aspect = 1/20)
+
+    ax_img.imshow(level, cmap = 'gray', vmin = 0, vmax = 255, extent = extent, interpolation = 'nearest', zorder = 1)
+
+    r    = np.array([r], dtype = np.float64).reshape(-1)
+    crds = generate_circle_crds(cx, cy, r, num).reshape(2, len(r), num)
+    for i in range(len(r)):
+        ax_img.plot(crds[1, i], crds[0, i], zorder = 2, c = 'red', alpha = 1, linewidth = 1)
+    ax_img.plot([cx], [cy], '+', zorder = 3, c = 'red', markersize = 10)
+
+    # Keep the view on the image...
+    ax_img.set_xlim(extent[0], extent[1])
+    ax_img.set_ylim(extent[2], extent[3])
+
+    str_r = ", ".join(f"{v:.2f}" for v in r)
+    ax_img.set_title(f"{title}\ncx = {cx:.2f}, cy = {cy:.2f}, r = {str_r}", fontproperties = prop_font)
+
+    sm = mpl.cm.ScalarMappable(norm = norm, cmap = 'gray')
+    fig.colorbar(sm, cax = ax_bar_img, orientation = "horizontal")
+
+    fig.savefig(path, dpi = dpi)
+
+    return path
+
+
+def export_figures(imgs, fits, drc, titles = None, formats = ("png", ), norm = None,
+                                                    max_size     = 1024,
+                                                    figsize      = (8, 9),
+                                                    dpi          = 100,
+                                                    num          = 360,
+                                                    path_font    = None,
+                                                    max_workers  = None,
+                                                    mp_context   = None):
+    """
+    Export summary figures of many calibration fits to `drc` on a process
+    pool, without opening any window.
+
+    `fits` is a list of (cx, cy, r) with one radius or an array of radii, and
+    `imgs` either one image shared by all fits or a list with one image per
+    fit.  Each distinct image is downsampled once to at most `max_size`
+    pixels per side, keeping ring extremes as in `Display`, and handed to
+    every worker once rather than with every figure.  `norm` defaults to the
+    color scale of `Display`.  A missing `path_font` falls back to the
+    default font.  Return the paths written, one per fit and format.
+    """
+    if isinstance(imgs, np.ndarray): imgs = [imgs] * len(fits)
+    if len(imgs) != len(fits): raise ValueError(f"Got {len(imgs)} images but {len(fits)} fits!!!")
+    if titles is None: titles = [ f"fit{i:04d}" for i in range(len(fits)) ]
+    if norm is None: norm = mcolors.TwoSlopeNorm(vcenter = 0, vmin = -1, vmax = 1)
+
+    # Downsample each distinct image once...
+    idx_by_id, levels, extents, idx_imgs = {}, [], [], []
+    for img in imgs:
+        if id(img) not in idx_by_id:
+            pyramid = ImagePyramid(img, norm, min_size = max_size)
+            idx_by_id[id(img)] = len(levels)
+            levels.append(pyramid.levels[-1])
+            extents.append(pyramid.get_extent(len(pyramid.levels) - 1))
+        idx_imgs.append(idx_by_id[id(img)])
+
+    os.makedirs(drc, exist_ok = True)
+
+    with ProcessPoolExecutor( max_workers = max_workers,
+                              mp_context  = mp_context,
+                              initializer = init_worker,
+                              initargs    = (levels, extents, path_font) ) as executor:
+        futures = []
+        for idx_img, (cx, cy, r), title in zip(idx_imgs, fits, titles):
+            for fmt in formats:
+                path = os.path.join(drc, f"{title}.{fmt}")
+                futures.append(executor.submit(render_figure, path, idx_img, cx, cy, r, title, norm, figsize, dpi, num))
+        paths = [ f.result() for f in futures ]
+
+    return paths
@@ -3,9 +3,30 @@
 
 from math import sqrt
 import numpy as np
-from scipy.ndimage import map_coordinates
+from scipy.ndimage import map_coordinates, spline_filter
+from scipy.optimize import least_squares
+from scipy.sparse import csr_matrix, lil_matrix
 import lmfit
 
+
+def generate_circle_crds(cx, cy, r, num, out = None):
+    """
+    Generate coordinates of `num` sample points along each circle of radii
+    `r` around (cx, cy), flattened circle by circle into shape
+    (2, len(r) * num).  Write into `out` if given.
+    """
+    r     = np.array([r], dtype = np.float64).reshape(-1, 1) # Facilitate broadcasting in calculting crds_x and crds_y
+    theta = np.linspace(0.0, 2 * np.pi, num)
+
+    crds = np.empty((2, r.size * num)) if out is None else out
+    crds[1] = (r * np.cos(theta) + cx).reshape(-1)   # In image, horizontal axis is axis=1 in matrix
+    crds[0] = (r * np.sin(theta) + cy).reshape(-1)
+
+    return crds
+
+
+
+
 class CircleModel:
     def __init__(self, cx, cy, r, num = 100):
         super().__init__()
@@ -15,15 +36,20 @@ class CircleModel:
         self.r   = r
         self.num = num
         self.crds = np.zeros((2, num))    # 2 is the size of (x, y)
+        self.rng  = np.random.default_rng()
 
 
     def set_seed(self, seed):
-        np.random.seed(seed)
+        """
+        Seed the model's own random generator, leaving the global state of
+        numpy alone.  `seed` may be an int or a SeedSequence.
+        """
+        self.rng = np.random.default_rng(seed)
 
 
     def update_crds_with_noise(self):
-        dx = np.random.normal(loc = 1.0, scale = 0.2, size = self.num)
-        dy = np.random.normal(loc = 1.0, scale = 0.2, size = self.num)
+        dx = self.rng.normal(loc = 1.0, scale = 0.2, size = self.num)
+        dy = self.rng.normal(loc = 1.0, scale = 0.2, size = self.num)
 
         self.crds[1] += dx
         self.crds[0] += dy
@@ -32,26 +58,21 @@ class CircleModel:
 
 
     def generate_crds(self):
-        theta = np.linspace(0.0, 2 * np.pi, self.num)
-
-        cx = self.cx
-        cy = self.cy
-        r  = self.r
-
-        # Convert input to numpy array with shape (N,)...
-        if not isinstance(theta, np.ndarray): theta = np.array([theta]).reshape(-1)
-
-        len_theta = len(theta)
-
-        self.crds[1] = r * np.cos(theta) + cx   # In image, horizontal axis is axis=1 in matrix
-        self.crds[0] = r * np.sin(theta) + cy
+        generate_circle_crds(self.cx, self.cy, self.r, self.num, out = self.crds)
 
         return None
 
 
-    def get_pixel_values(self, img):
-        ## pvals = map_coordinates(img, self.crds, order=1, mode='nearest')
-        pvals = map_coordinates(img, self.crds)
+    def get_pixel_values(self, img, crds = None, order = 3, coeffs = None):
+        """
+        Interpolate with spline `order` (0 for nearest, 1 for bilinear, 3 for
+        cubic).  Precomputed spline coefficients `coeffs` of the image skip
+        the prefiltering map_coordinates otherwise does on every call.
+        """
+        if crds is None: crds = self.crds
+
+        if coeffs is None: pvals = map_coordinates(img, crds, order = order)
+        else             : pvals = map_coordinates(coeffs, crds, order = order, prefilter = False)
 
         return pvals
 
@@ -74,37 +95,132 @@ class OptimizeCircleModel(CircleModel):
     def unpack_params(self, params): return [ v.value  for _, v in params.items() ]
 
 
-    def residual_model(self, params, img, **kwargs):
-        parvals = self.unpack_params(params)
-        self.cx, self.cy, self.r = parvals
-
-        self.generate_crds()
+    def residual_model(self, params, img, order = 3, coeffs = None, **kwargs):
+        """
+        Calculate the residual without touching the model, so that one model
+        can be fitted from several threads at once.
+        """
+        cx, cy, r = self.unpack_params(params)
 
-        pvals = self.get_pixel_values(img)
+        crds  = generate_circle_crds(cx, cy, r, self.num)
+        pvals = self.get_pixel_values(img, crds, order = order, coeffs = coeffs)
 
         pvals -= img.max()    # Measure the distance from the peak value
 
         return pvals
 
 
-    def fit(self, img, **kwargs):
-        print(f"___/ Fitting \___")
+    def update_from_params(self, params):
+        """
+        Move the model to the given parameters and regenerate crds.
+        """
+        self.cx, self.cy, self.r = self.unpack_params(params)
+        self.generate_crds()
+
+        return None
+
+
+    def solve(self, img, params = None, order = 3, coeffs = None, **kwargs):
+        """
+        Fit the residual model from `params` (the model's own by default)
+        without changing the model.
+        """
         res = lmfit.minimize( self.residual_model,
-                              self.params,
+                              self.params if params is None else params,
                               method     = 'leastsq',
                               nan_policy = 'omit',
                               args       = (img, ),
+                              kws        = { "order" : order, "coeffs" : coeffs },
                               **kwargs )
 
         return res
 
 
+    def fit(self, img, **kwargs):
+        """
+        Fit the residual model and leave the model at the best fit.
+        """
+        print(f"___/ Fitting \___")
+        res = self.solve(img, **kwargs)
+        self.update_from_params(res.params)
+
+        return res
+
+
+    def fit_scheduled(self, img, orders = (1, 3), step_tol = 0.05, **kwargs):
+        """
+        Fit with cheap interpolation first and accurate interpolation last,
+        see `solve_scheduled`, and leave the model at the best fit.
+        """
+        print(f"___/ Fitting \___")
+        res = solve_scheduled(self, img, orders = orders, step_tol = step_tol, **kwargs)
+        self.update_from_params(res.params)
+
+        return res
+
+
+    def fit_native(self, img, **kwargs):
+        """
+        Fit with MINPACK through scipy's least_squares, bypassing lmfit
+        Parameters in the residual.  Sample angles, the coordinate buffer,
+        the peak value and the cubic spline coefficients of the image, which
+        map_coordinates would otherwise recompute on every call, are set up
+        once.  Meant for batches of many small fits; the result is an lmfit
+        MinimizerResult.
+
+        MINPACK cannot apply bounds, so when any min or max is set on the
+        parameters the fit switches to the trust region reflective solver,
+        which honors them as `fit` does.
+        """
+        theta  = np.linspace(0.0, 2 * np.pi, self.num)
+        crds   = np.empty((2, self.num))
+        coeffs = spline_filter(img, order = 3, output = np.float64, mode = 'constant')
+        parvals, idx_vary, lower, upper = split_params(self.params)
+        is_bounded = np.any(np.isfinite(lower)) or np.any(np.isfinite(upper))
+
+        ret = least_squares( residual_varying,
+                             parvals[idx_vary],
+                             method = 'trf' if is_bounded else 'lm',
+                             bounds = (lower, upper),
+                             args   = (parvals, idx_vary, circle_residual, coeffs, img.max(), np.cos(theta), np.sin(theta), crds),
+                             **kwargs )
+
+        res = make_minimizer_result(self.params, ret.x, ret.fun, ret.jac, ret.nfev, ret.success, ret.message, method = 'least_squares')
+
+        # Leave the model at the best fit...
+        self.update_from_params(res.params)
+
+        return res
+
+
     def report_fit(self, res):
         lmfit.report_fit(res)
 
 
 
 
+def circle_residual(x, coeffs, img_max, cos_theta, sin_theta, crds):
+    """
+    Residual of a circle x = (cx, cy, r) as a pure function of the parameter
+    vector.  `coeffs` are the cubic spline coefficients of the image, and
+    `crds` is a (2, num) buffer that is overwritten.
+    """
+    cx, cy, r = x
+
+    np.multiply(cos_theta, r, out = crds[1])    # In image, horizontal axis is axis=1 in matrix
+    np.multiply(sin_theta, r, out = crds[0])
+    crds[1] += cx
+    crds[0] += cy
+
+    pvals = map_coordinates(coeffs, crds, prefilter = False)
+
+    pvals -= img_max    # Measure the distance from the peak value
+
+    return pvals
+
+
+
+
 class ConcentricCircles:
 
     def __init__(self, cx, cy, r, num = 100):
@@ -121,32 +237,21 @@ class ConcentricCircles:
         """
         Generate coordinates of sample points along each concentric circle
         """
-        # Fetching initial values that define concentric circles...
-        cx = self.cx
-        cy = self.cy
-        r  = np.array([self.r]).reshape(-1, 1) # Facilitate broadcasting in calculting crds_x and crds_y
-
-        # Find all theta values for generating coordinates of sample points...
-        theta = np.linspace(0.0, 2 * np.pi, self.num)
-        if not isinstance(theta, np.ndarray): theta = np.array([theta]).reshape(-1)
-
-        # Generate coordinates...
-        crds_x = r * np.cos(theta) + cx
-        crds_y = r * np.sin(theta) + cy
-
-        # Reshape crds into one flat array to facilitate optimization routine...
-        self.crds[1] = crds_x.reshape(-1)
-        self.crds[0] = crds_y.reshape(-1)
+        generate_circle_crds(self.cx, self.cy, self.r, self.num, out = self.crds)
 
         return None
 
 
-    def get_pixel_values(self, img):
+    def get_pixel_values(self, img, crds = None, order = 3, coeffs = None):
         """
         Get pixel values from all sample points.  If a sample point has 
-        subpixel coordinates, interpolation will take place.  
+        subpixel coordinates, interpolation of spline `order` will take
+        place, from the precomputed spline coefficients `coeffs` if given.
         """
-        pvals = map_coordinates(img, self.crds)
+        if crds is None: crds = self.crds
+
+        if coeffs is None: pvals = map_coordinates(img, crds, order = order)
+        else             : pvals = map_coordinates(coeffs, crds, order = order, prefilter = False)
 
         return pvals
 
@@ -181,43 +286,557 @@ class OptimizeConcentricCircles(ConcentricCircles):
         return [ v.value  for _, v in params.items() ]
 
 
-    def residual_model(self, params, img, **kwargs):
+    def residual_model(self, params, img, order = 3, coeffs = None, **kwargs):
         """
         Calculate the residual for least square optimization.
         """
         parvals = self.unpack_params(params)
-        self.cx, self.cy = parvals[:2]
-        self.r = parvals[2:]
 
-        self.generate_crds()
+        return self.residual_parvals(parvals, img, order, coeffs)
 
-        pvals = self.get_pixel_values(img)
+
+    def residual_parvals(self, parvals, img, order = 3, coeffs = None):
+        """
+        Calculate the residual from a sequence of parameter values
+        (cx, cy, r0, r1, ...).  The model is left untouched, so that one
+        model can be fitted from several threads at once.
+        """
+        crds  = generate_circle_crds(parvals[0], parvals[1], parvals[2:], self.num)
+        pvals = self.get_pixel_values(img, crds, order = order, coeffs = coeffs)
 
         pvals -= img.max()    # Measure the distance from the peak value
 
         return pvals
 
 
+    def update_from_params(self, params):
+        """
+        Move the model to the given parameters and regenerate crds.
+        """
+        parvals = self.unpack_params(params)
+        self.cx, self.cy = parvals[:2]
+        self.r = np.array(parvals[2:])
+        self.generate_crds()
+
+        return None
+
+
+    def solve(self, img, params = None, order = 3, coeffs = None, **kwargs):
+        """
+        Fit the residual model from `params` (the model's own by default)
+        without changing the model.
+        """
+        res = lmfit.minimize( self.residual_model,
+                              self.params if params is None else params,
+                              method     = 'leastsq',
+                              nan_policy = 'omit',
+                              args       = (img, ),
+                              kws        = { "order" : order, "coeffs" : coeffs },
+                              **kwargs )
+
+        return res
+
+
     def fit(self, img, **kwargs):
         """
-        Fit the residual model.
+        Fit the residual model and leave the model at the best fit.
+        """
+        print(f"___/ Fitting \___")
+        res = self.solve(img, **kwargs)
+        self.update_from_params(res.params)
+
+        return res
+
+
+    def fit_scheduled(self, img, orders = (1, 3), step_tol = 0.05, **kwargs):
+        """
+        Fit with cheap interpolation first and accurate interpolation last,
+        see `solve_scheduled`, and leave the model at the best fit.
+        """
+        print(f"___/ Fitting \___")
+        res = solve_scheduled(self, img, orders = orders, step_tol = step_tol, **kwargs)
+        self.update_from_params(res.params)
+
+        return res
+
+
+    def jac_sparsity(self):
+        """
+        Sparsity pattern of the Jacobian.  Residuals of circle i depend only
+        on (cx, cy, r_i).
+        """
+        num_circles = len(self.params) - 2
+        sparsity = lil_matrix((self.num * num_circles, 2 + num_circles), dtype = int)
+        sparsity[:, :2] = 1
+        for i in range(num_circles): sparsity[i * self.num:(i + 1) * self.num, 2 + i] = 1
+
+        return sparsity
+
+
+    def fit_sparse(self, img, **kwargs):
+        """
+        Fit the residual model with the trust region reflective solver of
+        scipy's least_squares, exploiting the block-sparse Jacobian, so the
+        cost per iteration grows linearly with the number of circles.
+
+        Bounds are taken from the min and max of the parameters, e.g.
+        `model.params["r0"].set(min = 95, max = 105)`, and parameters with
+        vary = False stay fixed.  The image is prefiltered once.  Return an
+        lmfit MinimizerResult, so `report_fit` works as usual.
         """
         print(f"___/ Fitting \___")
+        parvals, idx_vary, lower, upper = split_params(self.params)
+        coeffs = spline_filter(img, order = 3, output = np.float64, mode = 'constant')
+
+        ret = least_squares( residual_varying,
+                             parvals[idx_vary],
+                             jac_sparsity = self.jac_sparsity().tocsc()[:, idx_vary],
+                             method       = 'trf',
+                             bounds       = (lower, upper),
+                             args         = (parvals, idx_vary, self.residual_parvals, img, 3, coeffs),
+                             **kwargs )
+
+        res = make_minimizer_result(self.params, ret.x, ret.fun, ret.jac, ret.nfev, ret.success, ret.message, method = 'least_squares')
+
+        # Leave the model at the best fit...
+        self.update_from_params(res.params)
+
+        return res
+
+
+    def report_fit(self, res):
+        """
+        Report details of the optimization.  
+        """
+        lmfit.report_fit(res)
+
+
+
+
+def generate_ellipse_crds(cx, cy, e1, e2, r, num, out = None):
+    """
+    Generate coordinates of `num` sample points along each concentric
+    ellipse of mean radii `r` around (cx, cy), flattened ring by ring into
+    shape (2, len(r) * num).  All rings share the distortion (e1, e2): a
+    point of a circle at angle theta maps through [[1 + e1, e2], [e2, 1 - e1]].
+    Write into `out` if given.
+    """
+    r     = np.array([r], dtype = np.float64).reshape(-1, 1)
+    theta = np.linspace(0.0, 2 * np.pi, num)
+    cos_theta, sin_theta = np.cos(theta), np.sin(theta)
+
+    crds = np.empty((2, r.size * num)) if out is None else out
+
+    # Write through views of the rows, ring by ring...
+    x = crds[1].reshape(-1, num)    # In image, horizontal axis is axis=1 in matrix
+    y = crds[0].reshape(-1, num)
+    np.multiply(r, (1 + e1) * cos_theta + e2 * sin_theta, out = x)
+    np.multiply(r, e2 * cos_theta + (1 - e1) * sin_theta, out = y)
+    x += cx
+    y += cy
+
+    return crds
+
+
+def distortion_from_tilt(tilt, tilt_dir):
+    """
+    Distortion (e1, e2) of the rings seen on a detector tilted by `tilt`
+    toward the direction `tilt_dir` (radians), i.e. ellipses with the minor
+    to major axis ratio cos(tilt), the major axis along `tilt_dir`.
+    """
+    q   = np.cos(tilt)
+    eps = (1 - q) / (1 + q)
+
+    return eps * np.cos(2 * tilt_dir), eps * np.sin(2 * tilt_dir)
+
+
+def tilt_from_distortion(e1, e2):
+    """
+    Tilt angle and tilt direction (radians) of the distortion (e1, e2).
+    """
+    eps = np.hypot(e1, e2)
+    q   = (1 - eps) / (1 + eps)
+
+    return np.arccos(np.clip(q, -1.0, 1.0)), np.arctan2(e2, e1) / 2
+
+
+def sample_gradients(img, crds, order = 3, coeffs = None, h = 1e-2):
+    """
+    Gradients (gy, gx) of the interpolated image at `crds`, by central
+    differences of step `h` pixels in one map_coordinates call.  Unlike
+    gradients of the pixels, these match the residual exactly, noise
+    included.  Sample from the spline coefficients `coeffs` if given.
+    """
+    num = crds.shape[1]
+
+    # Shift along y, then along x...
+    crds_shifted = np.tile(crds, 4)
+    crds_shifted[0,        :    num] += h
+    crds_shifted[0,     num:2 * num] -= h
+    crds_shifted[1, 2 * num:3 * num] += h
+    crds_shifted[1, 3 * num:       ] -= h
+
+    if coeffs is None: pvals = map_coordinates(img, crds_shifted, order = order)
+    else             : pvals = map_coordinates(coeffs, crds_shifted, order = order, prefilter = False)
+    pvals = pvals.reshape(4, num)
+
+    return (pvals[0] - pvals[1]) / (2 * h), (pvals[2] - pvals[3]) / (2 * h)
+
+
+
+
+class ConcentricEllipses:
+
+    def __init__(self, cx, cy, r, num = 100, tilt = 0.0, tilt_dir = 0.0):
+        super().__init__()
+
+        self.cx  = cx                                # Beam center position in pixels along x-axis (axis = 1 in numpy format)
+        self.cy  = cy                                # Beam center position in pixels along y-axis
+        self.r   = np.array([r]).reshape(-1)         # List of mean radii for all concentric ellipses in pixels
+        self.num = num                               # Number of pixels sampled from an ellipse
+        self.e1, self.e2 = distortion_from_tilt(tilt, tilt_dir)    # Distortion shared by all ellipses
+        self.crds = np.zeros((2, num * len(self.r))) # Coordinates where pixels are sampled from all ellipses.  Unit is pixel.  2 is the size of (x, y)
+
+
+    def generate_crds(self):
+        """
+        Generate coordinates of sample points along each concentric ellipse
+        """
+        generate_ellipse_crds(self.cx, self.cy, self.e1, self.e2, self.r, self.num, out = self.crds)
+
+        return None
+
+
+    def get_pixel_values(self, img, crds = None, order = 3, coeffs = None):
+        """
+        Get pixel values from all sample points, from the precomputed spline
+        coefficients `coeffs` if given.
+        """
+        if crds is None: crds = self.crds
+
+        if coeffs is None: pvals = map_coordinates(img, crds, order = order)
+        else             : pvals = map_coordinates(coeffs, crds, order = order, prefilter = False)
+
+        return pvals
+
+
+    def residual_model(self, params, img, order = 3, coeffs = None, crds = None, **kwargs):
+        """
+        Calculate the residual for least square optimization.
+        """
+        parvals = self.unpack_params(params)
+
+        return self.residual_parvals(parvals, img, order, coeffs, crds)
+
+
+    def solve(self, img, params = None, order = 3, coeffs = None, **kwargs):
+        """
+        Fit the residual model with the analytic Jacobian from `params` (the
+        model's own by default) without changing the model.  The image is
+        prefiltered, and the buffer of sample coordinates allocated, once per
+        solve.  Subclasses provide `params`, `residual_parvals`,
+        `jacobian_model` and `update_from_params`.
+        """
+        if coeffs is None and order > 1: coeffs = spline_filter(img, order = order, output = np.float64, mode = 'constant')
+        crds = np.empty_like(self.crds)
+
         res = lmfit.minimize( self.residual_model,
-                              self.params,
+                              self.params if params is None else params,
                               method     = 'leastsq',
                               nan_policy = 'omit',
                               args       = (img, ),
+                              kws        = { "order" : order, "coeffs" : coeffs, "crds" : crds },
+                              Dfun       = self.jacobian_model,
                               **kwargs )
 
         return res
 
 
+    def fit(self, img, **kwargs):
+        """
+        Fit the residual model and leave the model at the best fit.
+        """
+        print(f"___/ Fitting \___")
+        res = self.solve(img, **kwargs)
+        self.update_from_params(res.params)
+
+        return res
+
+
+    def init_params(self): 
+        """
+        Initialize parameters for optimization.
+        """
+        return lmfit.Parameters()
+
+
+    def unpack_params(self, params): 
+        """
+        Unpack all parameters from dictionary.
+        """
+        return [ v.value  for _, v in params.items() ]
+
+
+    def tilt(self, params = None):
+        """
+        Return the tilt angle and tilt direction (radians) of `params`, the
+        model's own by default.
+        """
+        params = self.params if params is None else params
+
+        return tilt_from_distortion(params["e1"].value, params["e2"].value)
+
+
     def report_fit(self, res):
         """
-        Report details of the optimization.  
+        Report details of the optimization, and the tilt.
         """
         lmfit.report_fit(res)
+        tilt, tilt_dir = self.tilt(res.params)
+        print(f"    tilt     = {np.degrees(tilt):.4f} deg")
+        print(f"    tilt_dir = {np.degrees(tilt_dir):.4f} deg")
+
+
+
+
+class OptimizeConcentricEllipses(ConcentricEllipses):
+    """
+    Fit concentric ellipses that share a center and a tilt but have their
+    own radii, in one solve over all rings.
+
+    The tilt is fitted as the distortion (e1, e2) rather than as the tilt
+    angle and direction, in which ellipses are flat at zero tilt and the
+    direction is undefined.  `tilt` converts the fit back.  The Jacobian is
+    analytic by the chain rule, from image gradients at the ellipse points,
+    so it costs the same few samples whatever the number of rings.
+    """
+
+    def __init__(self, cx, cy, r, num, tilt = 0.0, tilt_dir = 0.0):
+        super().__init__(cx, cy, r, num, tilt = tilt, tilt_dir = tilt_dir)
+
+        # Provide parameters for optimization...
+        self.params = self.init_params()
+        self.params.add("cx", value = cx)
+        self.params.add("cy", value = cy)
+        self.params.add("e1", value = self.e1, min = -0.5, max = 0.5)
+        self.params.add("e2", value = self.e2, min = -0.5, max = 0.5)
+
+        # Set up radius parameter based on number of ellipses...
+        for i in range(len(self.r)): self.params.add(f"r{i:d}" , value = self.r[i] )
+
+
+    def residual_parvals(self, parvals, img, order = 3, coeffs = None, crds = None):
+        """
+        Calculate the residual from a sequence of parameter values
+        (cx, cy, e1, e2, r0, r1, ...) without touching the model.  Sample
+        coordinates are written into the scratch buffer `crds` if given.
+        """
+        crds  = generate_ellipse_crds(*parvals[:4], parvals[4:], self.num, out = crds)
+        pvals = self.get_pixel_values(img, crds, order = order, coeffs = coeffs)
+
+        pvals -= img.max()    # Measure the distance from the peak value
+
+        return pvals
+
+
+    def jacobian_columns(self, parvals, img, order = 3, coeffs = None, crds = None):
+        """
+        Derivatives of the residual by the shared parameters (cx, cy, e1, e2)
+        with shape (num_points, 4), and by the radius of the ring each point
+        belongs to.
+        """
+        cx, cy, e1, e2 = parvals[:4]
+        r = np.array(parvals[4:], dtype = np.float64)
+
+        crds   = generate_ellipse_crds(cx, cy, e1, e2, r, self.num, out = crds)
+        gy, gx = sample_gradients(img, crds, order = order, coeffs = coeffs)
+
+        theta = np.linspace(0.0, 2 * np.pi, self.num)
+        cos_t = np.tile(np.cos(theta), len(r))
+        sin_t = np.tile(np.sin(theta), len(r))
+        r_t   = np.repeat(r, self.num)
+
+        jac_shared = np.empty((len(gx), 4))
+        jac_shared[:, 0] = gx
+        jac_shared[:, 1] = gy
+        jac_shared[:, 2] = r_t * (gx * cos_t - gy * sin_t)
+        jac_shared[:, 3] = r_t * (gx * sin_t + gy * cos_t)
+
+        jac_r = gx * ((1 + e1) * cos_t + e2 * sin_t) + gy * (e2 * cos_t + (1 - e1) * sin_t)
+
+        return jac_shared, jac_r
+
+
+    def jacobian_model(self, params, img, order = 3, coeffs = None, crds = None, **kwargs):
+        """
+        Dense Jacobian by the varying parameters for lmfit's leastsq.
+        """
+        parvals = self.unpack_params(params)
+        jac_shared, jac_r = self.jacobian_columns(parvals, img, order, coeffs, crds)
+
+        num_rings = len(parvals) - 4
+        jac = np.zeros((len(jac_r), 4 + num_rings))
+        jac[:, :4] = jac_shared
+        jac[np.arange(len(jac_r)), 4 + np.repeat(np.arange(num_rings), self.num)] = jac_r
+
+        return jac[:, [ v.vary for _, v in params.items() ]]
+
+
+    def update_from_params(self, params):
+        """
+        Move the model to the given parameters and regenerate crds.
+        """
+        parvals = self.unpack_params(params)
+        self.cx, self.cy, self.e1, self.e2 = parvals[:4]
+        self.r = np.array(parvals[4:])
+        self.generate_crds()
+
+        return None
+
+
+    def fit_sparse(self, img, **kwargs):
+        """
+        Fit with the trust region reflective solver of scipy's least_squares
+        and the analytic Jacobian as a sparse matrix, so the cost per
+        iteration grows linearly with the number of rings.  The image is
+        prefiltered, and the buffer of sample coordinates allocated, once.
+        Bounds are taken from the min and max of the parameters, and
+        parameters with vary = False stay fixed.  Return an lmfit
+        MinimizerResult.
+        """
+        print(f"___/ Fitting \___")
+        parvals, idx_vary, lower, upper = split_params(self.params)
+        coeffs = spline_filter(img, order = 3, output = np.float64, mode = 'constant')
+        crds   = np.empty_like(self.crds)
+
+        # Fixed layout of the sparse Jacobian, 5 entries per row...
+        num_rings  = len(parvals) - 4
+        num_points = self.num * num_rings
+        indices = np.empty((num_points, 5), dtype = np.int64)
+        indices[:, :4] = np.arange(4)
+        indices[:, 4]  = 4 + np.repeat(np.arange(num_rings), self.num)
+        indices = indices.reshape(-1)
+        indptr  = np.arange(0, 5 * num_points + 1, 5)
+
+        def jac(x, *args):
+            x_all = parvals.copy()
+            x_all[idx_vary] = x
+            jac_shared, jac_r = self.jacobian_columns(x_all, img, 3, coeffs, crds)
+            data = np.concatenate([ jac_shared, jac_r[:, None] ], axis = 1).reshape(-1)
+
+            # Keep the columns of the varying parameters...
+            return csr_matrix((data, indices, indptr), shape = (num_points, 4 + num_rings))[:, idx_vary]
+
+        ret = least_squares( residual_varying,
+                             parvals[idx_vary],
+                             jac    = jac,
+                             method = 'trf',
+                             bounds = (lower, upper),
+                             args   = (parvals, idx_vary, self.residual_parvals, img, 3, coeffs, crds),
+                             **kwargs )
+
+        res = make_minimizer_result(self.params, ret.x, ret.fun, ret.jac, ret.nfev, ret.success, ret.message, method = 'least_squares')
+
+        # Leave the model at the best fit...
+        self.update_from_params(res.params)
+
+        return res
+
+
+
+
+def ring_tan_2theta(d_spacings, wavelength):
+    """
+    Return tan(2 theta_n) of the rings of the given d-spacings, with
+    sin(theta_n) = wavelength / (2 d_n), in the units of the wavelength.
+    """
+    sin_theta = wavelength / (2 * np.asarray(d_spacings, dtype = np.float64))
+    if np.any(sin_theta >= 1): raise ValueError("Some d-spacings are too small to diffract at this wavelength!!!")
+
+    return np.tan(2 * np.arcsin(sin_theta))
+
+
+
+
+class OptimizeCalibrantRings(ConcentricEllipses):
+    """
+    Fit the rings of a calibrant with known d-spacings, whose radii follow
+    r_n = L tan(2 theta_n) with the detector distance L in pixels.
+
+    Only the center and L are fitted, plus the distortion (e1, e2) of
+    `OptimizeConcentricEllipses` if a `tilt` is given, so the number of
+    parameters is the same for any number of rings and weak outer rings
+    are held in place by the inner ones.  The Jacobian is analytic.
+    """
+
+    def __init__(self, cx, cy, L, d_spacings, wavelength, num, tilt = None, tilt_dir = 0.0):
+        self.d_spacings = np.asarray(d_spacings, dtype = np.float64)
+        self.wavelength = wavelength
+        self.tan_2theta = ring_tan_2theta(self.d_spacings, wavelength)
+        self.L          = L
+
+        super().__init__(cx, cy, L * self.tan_2theta, num, tilt = 0.0 if tilt is None else tilt, tilt_dir = tilt_dir)
+
+        # Provide parameters for optimization, with the tilt fixed unless asked...
+        is_tilt = tilt is not None
+        self.params = self.init_params()
+        self.params.add("cx", value = cx)
+        self.params.add("cy", value = cy)
+        self.params.add("L" , value = L, min = 0.0)
+        self.params.add("e1", value = self.e1, min = -0.5, max = 0.5, vary = is_tilt)
+        self.params.add("e2", value = self.e2, min = -0.5, max = 0.5, vary = is_tilt)
+
+
+    def residual_parvals(self, parvals, img, order = 3, coeffs = None, crds = None):
+        """
+        Calculate the residual from a sequence of parameter values
+        (cx, cy, L, e1, e2) without touching the model.  Sample coordinates
+        are written into the scratch buffer `crds` if given.
+        """
+        cx, cy, L, e1, e2 = parvals
+
+        crds  = generate_ellipse_crds(cx, cy, e1, e2, L * self.tan_2theta, self.num, out = crds)
+        pvals = self.get_pixel_values(img, crds, order = order, coeffs = coeffs)
+
+        pvals -= img.max()    # Measure the distance from the peak value
+
+        return pvals
+
+
+    def jacobian_model(self, params, img, order = 3, coeffs = None, crds = None, **kwargs):
+        """
+        Jacobian by the varying parameters for lmfit's leastsq.
+        """
+        cx, cy, L, e1, e2 = self.unpack_params(params)
+        r = L * self.tan_2theta
+
+        crds   = generate_ellipse_crds(cx, cy, e1, e2, r, self.num, out = crds)
+        gy, gx = sample_gradients(img, crds, order = order, coeffs = coeffs)
+
+        theta = np.linspace(0.0, 2 * np.pi, self.num)
+        cos_t = np.tile(np.cos(theta), len(r))
+        sin_t = np.tile(np.sin(theta), len(r))
+        r_t   = np.repeat(r, self.num)
+
+        jac = np.empty((len(gx), 5))
+        jac[:, 0] = gx
+        jac[:, 1] = gy
+        jac[:, 2] = (gx * ((1 + e1) * cos_t + e2 * sin_t) + gy * (e2 * cos_t + (1 - e1) * sin_t)) * np.repeat(self.tan_2theta, self.num)
+        jac[:, 3] = r_t * (gx * cos_t - gy * sin_t)
+        jac[:, 4] = r_t * (gx * sin_t + gy * cos_t)
+
+        return jac[:, [ v.vary for _, v in params.items() ]]
+
+
+    def update_from_params(self, params):
+        """
+        Move the model to the given parameters and regenerate crds.
+        """
+        self.cx, self.cy, self.L, self.e1, self.e2 = self.unpack_params(params)
+        self.r = self.L * self.tan_2theta
+        self.generate_crds()
+
+        return None
 
 
 
@@ -250,3 +869,137 @@ class InitCircle:
         r = sqrt( (x1 - cx)**2 + (y1 - cy)**2 )
 
         return cx, cy, r
+
+
+
+
+def solve_scheduled(model, img, params = None, orders = (1, 3), step_tol = 0.05, max_nfev_stage = None, max_bursts = 10, **kwargs):
+    """
+    Fit `model` with an interpolation schedule, e.g. bilinear (1) while far
+    from the optimum and cubic spline (3) for the final iterations.
+
+    Each order but the last runs in bursts of `max_nfev_stage` evaluations
+    (ten iterations by default) until the fit converges, no parameter moves
+    by more than `step_tol` pixels in a burst, or `max_bursts` bursts have
+    run, then the next order takes over from there.  The last order runs to
+    convergence, so the answer is that of a fit with the last order alone.
+    A `max_nfev` bounds the evaluations of all stages together, of which
+    the orders before the last spend at most half, so the last order always
+    runs.  Spline coefficients are computed once per order above 1.  The
+    model is not changed.  Return the lmfit result of the last stage, with
+    `orders` listing (order, nfev) of every stage and `nfev` summed over all
+    stages.
+    """
+    params   = model.params if params is None else params
+    max_nfev = kwargs.pop("max_nfev", None)
+    if len(orders) == 0: raise ValueError("At least one interpolation order is required!!!")
+    if max_nfev is not None and max_nfev < 1: raise ValueError(f"max_nfev must be positive, got {max_nfev}!!!")
+    if max_nfev_stage is None: max_nfev_stage = 10 * (len(params) + 1)
+
+    # Keep a share of the budget for the last order...
+    max_nfev_early = None if max_nfev is None else max_nfev // 2
+
+    stages = []
+    for i, order in enumerate(orders):
+        is_last = i == len(orders) - 1
+        coeffs  = spline_filter(img, order = order, output = np.float64, mode = 'constant') if order > 1 else None
+
+        for _ in range(1 if is_last else max_bursts):
+            # Spend no more than what is left of the budget...
+            nfev_used = sum(nfev for _, nfev in stages)
+            if is_last:
+                nfev = None if max_nfev is None else max(max_nfev - nfev_used, 1)
+            else:
+                nfev_left = None if max_nfev is None else max_nfev_early - nfev_used
+                if nfev_left is not None and nfev_left <= 0: break
+                nfev = max_nfev_stage if nfev_left is None else min(max_nfev_stage, nfev_left)
+
+            res = model.solve(img, params = params, order = order, coeffs = coeffs, max_nfev = nfev, **kwargs)
+            stages.append((order, res.nfev))
+
+            step   = np.max(np.abs(np.subtract(model.unpack_params(res.params), model.unpack_params(params))))
+            params = res.params
+            if res.success or step < step_tol: break
+
+    res.orders = stages
+    res.nfev   = sum(nfev for _, nfev in stages)
+
+    return res
+
+
+def split_params(params):
+    """
+    Return the values of all parameters, the indices of those that vary, and
+    the lower and upper bounds of those that vary.
+    """
+    parvals  = np.array([ v.value for _, v in params.items() ], dtype = np.float64)
+    idx_vary = np.array([ i for i, (_, v) in enumerate(params.items()) if v.vary ], dtype = np.int64)
+    lower    = np.array([ v.min for _, v in params.items() ])[idx_vary]
+    upper    = np.array([ v.max for _, v in params.items() ])[idx_vary]
+
+    return parvals, idx_vary, lower, upper
+
+
+def residual_varying(x, parvals, idx_vary, residual_parvals, *args):
+    """
+    Evaluate `residual_parvals` with the varying parameters set to `x` and
+    the fixed ones kept from `parvals`.
+    """
+    parvals = parvals.copy()
+    parvals[idx_vary] = x
+
+    return residual_parvals(parvals, *args)
+
+
+def make_minimizer_result(params, x, residual, jac, nfev, success, message, method):
+    """
+    Wrap a solution found outside of lmfit into an lmfit MinimizerResult,
+    with uncertainties from the Jacobian at the solution scaled by the
+    reduced chi-square, as lmfit does for leastsq.  `x` and the columns of
+    `jac` belong to the varying parameters, in order.
+    """
+    params    = params.copy()
+    var_names = [ name for name, par in params.items() if par.vary ]
+    init_vals = [ params[name].value for name in var_names ]
+    for name, v in zip(var_names, x): params[name].value = float(v)
+
+    # Goodness of fit...
+    ndata   = len(residual)
+    nvarys  = len(x)
+    nfree   = max(ndata - nvarys, 1)
+    chisqr  = float(residual @ residual)
+    redchi  = chisqr / nfree
+    neg2_ll = ndata * np.log(max(chisqr, 1e-250) / ndata)
+
+    # Covariance from the Jacobian, which may be sparse...
+    jac  = jac.toarray() if hasattr(jac, "toarray") else np.asarray(jac)
+    hess = jac.T @ jac
+    try:
+        covar = np.linalg.inv(hess) * redchi
+        errorbars = bool(np.all(np.diag(covar) >= 0))
+    except np.linalg.LinAlgError:
+        covar, errorbars = None, False
+
+    if errorbars:
+        stderr = np.sqrt(np.diag(covar))
+        for i, name in enumerate(var_names):
+            params[name].stderr = float(stderr[i])
+            params[name].correl = { name_j : covar[i, j] / (stderr[i] * stderr[j]) for j, name_j in enumerate(var_names) if j != i }
+
+    return lmfit.minimizer.MinimizerResult( params      = params,
+                                            var_names   = var_names,
+                                            init_vals   = init_vals,
+                                            covar       = covar,
+                                            errorbars   = errorbars,
+                                            residual    = residual,
+                                            nfev        = nfev,
+                                            success     = success,
+                                            message     = message,
+                                            method      = method,
+                                            ndata       = ndata,
+                                            nvarys      = nvarys,
+                                            nfree       = nfree,
+                                            chisqr      = chisqr,
+                                            redchi      = redchi,
+                                            aic         = neg2_ll + 2 * nvarys,
+                                            bic         = neg2_ll + np.log(ndata) * nvarys, )
@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import copy
+import time
+import queue
+import threading
+import traceback
+import numpy as np
+
+from .model import OptimizeConcentricCircles
+
+
+class CalibrationMonitor:
+    """
+    Fold frames into a pool as they arrive and refit the concentric circles
+    on the running pooled image in a background thread.
+
+    Every `cadence` seconds the refit thread takes a snapshot of the pooled
+    image, if new frames came in, and fits it starting from the previous
+    result.  Ingestion only waits for the copy of the accumulators, never for
+    a fit.  Refits are not queued: ticks that pass while a fit runs are
+    coalesced, so the next fit always works on the latest data.
+
+    Each result is a dict with the wall-clock `timestamp`, `num_frames`
+    pooled, `cx`, `cy`, `r` and the lmfit result `res` (or `error`), and is
+    passed to `callback` if given, or else put on the `results` queue.
+    """
+
+    def __init__(self, pool, cx, cy, r, num = 100, cadence = 5.0, callback = None, **kwargs):
+        self.pool     = pool
+        self.cx       = cx
+        self.cy       = cy
+        self.r        = np.array([r], dtype = np.float64).reshape(-1)
+        self.num      = num
+        self.cadence  = cadence
+        self.callback = callback
+        self.kwargs   = kwargs    # Passed on to fit
+
+        self.results        = queue.Queue()
+        self.lock           = threading.Lock()
+        self.stop_event     = threading.Event()
+        self.thread         = None
+        self.num_frames     = 0
+        self.num_frames_fit = 0
+
+
+    def push(self, frame):
+        """
+        Fold a frame into the running pooled image.
+        """
+        with self.lock:
+            self.pool.update(frame)
+            self.num_frames += 1
+
+        return None
+
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target = self.refit_loop, daemon = True)
+        self.thread.start()
+
+        return self
+
+
+    def stop(self):
+        """
+        Stop the refit thread, waiting for a fit in flight to finish.
+        """
+        self.stop_event.set()
+        if self.thread is not None: self.thread.join()
+        self.thread = None
+
+        return None
+
+
+    def __enter__(self): return self.start()
+
+
+    def __exit__(self, *args): self.stop()
+
+
+    def refit_loop(self):
+        while not self.stop_event.wait(self.cadence):
+            self.refit()
+
+
+    def snapshot(self):
+        """
+        Copy the pooled image if frames arrived since the last fit.  Only the
+        accumulators are copied under the lock, the image is computed from
+        the copy outside it, so ingestion never waits for `result`.
+        """
+        with self.lock:
+            if self.num_frames == self.num_frames_fit: return None, self.num_frames
+
+            state      = { k : np.array(v) for k, v in self.pool.state_dict().items() }
+            num_frames = self.num_frames
+
+        pool = copy.copy(self.pool).load_state_dict(state)
+
+        return pool.result(), num_frames
+
+
+    def refit(self):
+        """
+        Fit the current pooled image, warm started from the last result, and
+        publish the result.  Return the result, or None without new frames.
+        """
+        img, num_frames = self.snapshot()
+        if img is None: return None
+        self.num_frames_fit = num_frames
+
+        result = { "timestamp"  : time.time(),
+                   "num_frames" : num_frames, }
+        try:
+            # Normalize image...
+            img = (img - np.mean(img)) / np.std(img)
+
+            model = OptimizeConcentricCircles(cx = self.cx, cy = self.cy, r = self.r, num = self.num)
+            res   = model.fit(img, **self.kwargs)
+
+            # Warm start the next fit...
+            parvals = model.unpack_params(res.params)
+            self.cx, self.cy = parvals[:2]
+            self.r = np.array(parvals[2:])
+
+            result.update(cx = self.cx, cy = self.cy, r = self.r.copy(), res = res)
+        except Exception:
+            result["error"] = traceback.format_exc()
+
+        self.publish(result)
+
+        return result
+
+
+    def publish(self, result):
+        if self.callback is None:
+            self.results.put(result)
+        else:
+            self.callback(result)
+
+        return None
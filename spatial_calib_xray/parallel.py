@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from scipy.ndimage import map_coordinates
+from concurrent.futures import ThreadPoolExecutor
+
+from .model import OptimizeCircleModel, OptimizeConcentricCircles
+
+
+def fit_concurrent(model, imgs, params_list = None, max_workers = None, **kwargs):
+    """
+    Run many fits of one model at once in a thread pool, sharing images
+    instead of copying them to other processes.
+
+    `imgs` is either one image shared by all fits or a list with one image
+    per fit, and `params_list` gives the starting parameters of each fit
+    (the model's own by default).  The model is not changed.  Return the
+    lmfit results in order.
+    """
+    if isinstance(imgs, np.ndarray):
+        if params_list is None: raise ValueError("Starting parameters are required to fit one image several times!!!")
+        imgs = [imgs] * len(params_list)
+    if params_list is None: params_list = [model.params] * len(imgs)
+    if len(imgs) != len(params_list): raise ValueError(f"Got {len(imgs)} images but {len(params_list)} sets of parameters!!!")
+
+    with ThreadPoolExecutor(max_workers = max_workers) as executor:
+        futures = [ executor.submit(model.solve, img, params = params, **kwargs) for img, params in zip(imgs, params_list) ]
+        res_list = [ f.result() for f in futures ]
+
+    return res_list
+
+
+def score_seeds(img, seeds, num, order = 1):
+    """
+    Score many candidate parameter sets (cx, cy, r0, r1, ...), one per row of
+    `seeds`, by the sum of squared residuals, gathering the pixel values of
+    all candidates in a single map_coordinates call.  Ranking seeds needs no
+    cubic accuracy, so bilinear interpolation is the default.
+    """
+    seeds = np.asarray(seeds, dtype = np.float64)
+    cx, cy, r = seeds[:, 0, None, None], seeds[:, 1, None, None], seeds[:, 2:, None]
+    theta = np.linspace(0.0, 2 * np.pi, num)
+
+    # Stack coordinates of all candidates, circle by circle...
+    crds = np.empty((2, seeds.shape[0], r.shape[1], num))
+    crds[1] = r * np.cos(theta) + cx    # In image, horizontal axis is axis=1 in matrix
+    crds[0] = r * np.sin(theta) + cy
+
+    pvals  = map_coordinates(img, crds.reshape(2, -1), order = order).reshape(seeds.shape[0], -1)
+    pvals -= img.max()    # Measure the distance from the peak value
+
+    return np.sum(pvals**2, axis = 1)
+
+
+def fit_multistart(model, img, num_seeds = 64, top_k = 4, scale_center = 2.0, scale_r = 2.0, seed = None, score_order = 1, max_workers = None, **kwargs):
+    """
+    Fit from a cloud of seeds perturbed around the model's parameters.
+
+    Seeds are drawn with normal perturbations of `scale_center` pixels for the
+    center and `scale_r` pixels for the radii, plus the unperturbed seed.
+    Fixed parameters are not perturbed, and seeds are clipped to the bounds
+    of each parameter.  All seeds are scored in one batch with spline order
+    `score_order`, and only the `top_k` best are fitted, concurrently.
+    Return the best result by chi-square, all top-k results, and the
+    standard deviation of each parameter across them.
+
+    Seeds are scored as circles (cx, cy, r0, r1, ...), so only circle models
+    are supported.
+    """
+    if not isinstance(model, (OptimizeCircleModel, OptimizeConcentricCircles)):
+        raise ValueError(f"Model {type(model).__name__} is not supported!!!  Choose from ['OptimizeCircleModel', 'OptimizeConcentricCircles'].")
+
+    rng   = np.random.default_rng(seed)
+    names = list(model.params.keys())
+    x0    = np.array(model.unpack_params(model.params), dtype = np.float64)
+
+    # Perturb around the initial values, keeping them as the first seed...
+    scale = np.full(len(x0), scale_r)
+    scale[:2] = scale_center
+    scale[[ not v.vary for _, v in model.params.items() ]] = 0.0
+    seeds = x0 + rng.normal(size = (num_seeds, len(x0))) * scale
+    seeds[0] = x0
+
+    # Keep every seed within the bounds...
+    lower = np.array([ v.min for _, v in model.params.items() ], dtype = np.float64)
+    upper = np.array([ v.max for _, v in model.params.items() ], dtype = np.float64)
+    np.clip(seeds, lower, upper, out = seeds)
+
+    scores   = score_seeds(img, seeds, model.num, order = score_order)
+    idx_best = np.argsort(scores)[:top_k]
+
+    # Fit the most promising seeds only...
+    params_list = []
+    for idx in idx_best:
+        params = model.params.copy()
+        for name, v in zip(names, seeds[idx]): params[name].value = v
+        params_list.append(params)
+    res_list = fit_concurrent(model, img, params_list, max_workers = max_workers, **kwargs)
+
+    res_best = min(res_list, key = lambda res: res.chisqr)
+    values   = np.array([ model.unpack_params(res.params) for res in res_list ])
+    spread   = dict(zip(names, values.std(axis = 0)))
+
+    return res_best, res_list, spread
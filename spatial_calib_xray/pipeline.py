@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import queue
+import traceback
+import numpy as np
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+from .pool import MaxPool
+
+
+class FrameRingBuffer:
+    """
+    A fixed number of preallocated frame slots living in one shared memory
+    block.  Readers take a free slot, write a frame into it and hand the slot
+    index to consumers, which work on the slot in place and give it back.
+    Only slot indices travel through the queues, frames are never pickled.
+
+    A reader blocks when every slot is in use, which throttles reading to the
+    pace of the consumers.
+    """
+
+    def __init__(self, num_slots, shape, dtype = np.float64, ctx = None):
+        ctx = mp.get_context() if ctx is None else ctx
+
+        self.num_slots = num_slots
+        self.shape     = tuple(shape)
+        self.dtype     = np.dtype(dtype)
+
+        # Allocate all slots at once...
+        nbytes   = num_slots * int(np.prod(self.shape)) * self.dtype.itemsize
+        self.shm = shared_memory.SharedMemory(create = True, size = nbytes)
+        self.is_owner = True
+        self.attach_slots()
+
+        # Every slot is free to begin with...
+        self.free_slots = ctx.Queue()
+        self.full_slots = ctx.Queue()
+        for slot in range(num_slots): self.free_slots.put(slot)
+
+
+    def attach_slots(self):
+        self.slots = np.ndarray((self.num_slots, *self.shape), dtype = self.dtype, buffer = self.shm.buf)
+
+
+    def __getstate__(self):
+        # Only ship the name of the shared memory block to a spawned process...
+        state = self.__dict__.copy()
+        state["shm"]   = self.shm.name
+        state["slots"] = None
+
+        return state
+
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.shm      = shared_memory.SharedMemory(name = state["shm"])
+        self.is_owner = False
+        self.attach_slots()
+
+
+    def close(self):
+        """
+        Release the shared memory block, and free it if it was created here.
+        """
+        self.slots = None
+        self.shm.close()
+        if self.is_owner: self.shm.unlink()
+
+        return None
+
+
+
+
+def get_until_stopped(q, stop_event, timeout = 0.1):
+    """
+    Block on a queue, but give up once the stop event is set.  Return None if
+    stopped.
+    """
+    while not stop_event.is_set():
+        try:
+            return q.get(timeout = timeout)
+        except queue.Empty:
+            continue
+
+    return None
+
+
+def read_frames(ring, read_frame, event_nums, results, stop_event, accept_frame = None):
+    """
+    Producer: read frames and write them into free slots of the ring buffer.
+    Events whose frame is None (e.g. missing in psana) or that are rejected by
+    `accept_frame` are skipped before taking a slot.
+    """
+    try:
+        for event_num in event_nums:
+            if stop_event.is_set(): break
+
+            frame = read_frame(event_num)
+            if frame is None: continue
+            if accept_frame is not None and not accept_frame(frame): continue
+
+            slot = get_until_stopped(ring.free_slots, stop_event)
+            if slot is None: break
+
+            ring.slots[slot] = frame
+            ring.full_slots.put((slot, event_num))
+    except Exception:
+        results.put(("error", traceback.format_exc()))
+
+
+def reduce_frames(ring, make_reducer, results, stop_event):
+    """
+    Consumer: fold frames from filled slots into a reducer, then return the
+    slot.  The reducer is sent back once a sentinel (None) is received.
+    """
+    try:
+        reducer = make_reducer()
+        while True:
+            item = get_until_stopped(ring.full_slots, stop_event)
+            if item is None: break
+
+            slot, event_num = item
+            reducer.update(ring.slots[slot])
+            ring.free_slots.put(slot)
+
+        if not stop_event.is_set(): results.put(("done", reducer))
+    except Exception:
+        results.put(("error", traceback.format_exc()))
+
+
+
+
+class FramePipeline:
+    """
+    Pool frames with separate reader and reducer processes connected by a
+    shared memory ring buffer.  A reader is a callable mapping an event number
+    to a frame of fixed shape, and a reducer is created by `make_reducer` and
+    provides `update(frame)` and `merge(other)`, like `MaxPool`.
+
+    With the default fork context `read_frame` can open its data source
+    lazily in each reader process, which psana requires.  Reducers must not
+    keep a reference to the frame passed to `update`, as the slot is reused.
+
+    An optional `accept_frame`, e.g. a `FrameSelector`, runs in the readers
+    and drops uninformative frames before they reach a reducer.
+    """
+
+    def __init__(self, read_frame, shape, dtype        = np.float64,
+                                          make_reducer = MaxPool,
+                                          num_readers  = 1,
+                                          num_reducers = 1,
+                                          num_slots    = None,
+                                          accept_frame = None,
+                                          ctx          = None):
+        self.read_frame   = read_frame
+        self.shape        = tuple(shape)
+        self.dtype        = dtype
+        self.make_reducer = make_reducer
+        self.num_readers  = num_readers
+        self.num_reducers = num_reducers
+        self.num_slots    = 2 * (num_readers + num_reducers) if num_slots is None else num_slots
+        self.accept_frame = accept_frame
+        self.ctx          = mp.get_context() if ctx is None else ctx
+
+
+    def run(self, event_nums, timeout = 0.1):
+        """
+        Pool all frames in `event_nums` and return the merged reducer.
+        Event numbers are dealt out to readers in a round-robin fashion.
+        """
+        ctx        = self.ctx
+        ring       = FrameRingBuffer(self.num_slots, self.shape, dtype = self.dtype, ctx = ctx)
+        results    = ctx.Queue()
+        stop_event = ctx.Event()
+
+        event_nums = list(event_nums)
+        readers = [ ctx.Process(target = read_frames,
+                                args   = (ring, self.read_frame, event_nums[i::self.num_readers], results, stop_event, self.accept_frame))
+                    for i in range(self.num_readers) ]
+        reducers = [ ctx.Process(target = reduce_frames,
+                                 args   = (ring, self.make_reducer, results, stop_event))
+                     for i in range(self.num_reducers) ]
+
+        reducer_list = []
+        try:
+            for p in readers + reducers: p.start()
+
+            # Wait for readers while watching out for failures...
+            while any(p.is_alive() for p in readers):
+                self.check_results(results, reducer_list, readers + reducers, timeout)
+
+            # Tell each reducer to finish up once the remaining slots are consumed...
+            for _ in reducers: ring.full_slots.put(None)
+            while len(reducer_list) < self.num_reducers:
+                self.check_results(results, reducer_list, readers + reducers, timeout)
+
+            for p in readers + reducers: p.join()
+        finally:
+            stop_event.set()
+            for p in readers + reducers:
+                p.join(timeout = 1.0)
+                if p.is_alive(): p.terminate()
+            ring.close()
+
+        # Merge partial results from all reducers...
+        reducer = reducer_list[0]
+        for other in reducer_list[1:]: reducer.merge(other)
+
+        return reducer
+
+
+    def check_results(self, results, reducer_list, procs, timeout):
+        """
+        Collect finished reducers, and raise if any worker failed.
+        """
+        try:
+            status, payload = results.get(timeout = timeout)
+        except queue.Empty:
+            # A worker killed from outside never reports back...
+            for p in procs:
+                if p.exitcode not in (None, 0): raise RuntimeError(f"Worker {p.name} exited with code {p.exitcode}.")
+            return None
+
+        if status == "error": raise RuntimeError(f"Worker failed in the frame pipeline:\n{payload}")
+
+        reducer_list.append(payload)
+
+        return None
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from collections import OrderedDict
+from scipy.ndimage import map_coordinates
+
+
+class PolarTransform:
+    """
+    Resample an image onto a polar grid (theta, r) around a center, so that
+    rings become straight lines along theta.
+
+    Sampling coordinates depend only on the center, and are cached with the
+    center rounded to `decimals` places, so small center updates reuse a map.
+    The remapped image is then exactly polar about the rounded center, which
+    is returned along with it.
+    """
+
+    def __init__(self, r_min, r_max, num_r = None, num_theta = 360, order = 1, decimals = 1, max_cache = 8):
+        self.r         = np.linspace(r_min, r_max, int(r_max - r_min) + 1 if num_r is None else num_r)
+        self.theta     = np.linspace(0.0, 2 * np.pi, num_theta, endpoint = False)
+        self.order     = order
+        self.decimals  = decimals
+        self.max_cache = max_cache
+        self.cache     = OrderedDict()
+
+        # Offsets from the center of every sample of the polar grid...
+        self.cos_grid = np.cos(self.theta)[:, None] * self.r[None, :]
+        self.sin_grid = np.sin(self.theta)[:, None] * self.r[None, :]
+
+
+    def get_crds(self, cx, cy):
+        """
+        Return the rounded center and its sampling coordinates with shape
+        (2, num_theta, num_r).
+        """
+        key = (round(cx, self.decimals), round(cy, self.decimals))
+        if key in self.cache:
+            self.cache.move_to_end(key)
+        else:
+            crds = np.empty((2, *self.cos_grid.shape))
+            crds[1] = self.cos_grid + key[0]    # In image, horizontal axis is axis=1 in matrix
+            crds[0] = self.sin_grid + key[1]
+            self.cache[key] = crds
+            if len(self.cache) > self.max_cache: self.cache.popitem(last = False)
+
+        return key, self.cache[key]
+
+
+    def remap(self, img, cx, cy):
+        """
+        Return the polar image with shape (num_theta, num_r) and the center
+        (cx, cy) it was sampled about.
+        """
+        center, crds = self.get_crds(cx, cy)
+        polar = map_coordinates(img, crds, order = self.order, mode = 'constant', cval = np.nan)
+
+        return polar, center
+
+
+    def find_peaks(self, polar, r, half_width):
+        """
+        Find the radius of each ring at every angle as the maximum within
+        `half_width` of its expected radius `r`, refined by a parabola through
+        the maximum and its neighbors.  Return an array with shape
+        (num_rings, num_theta), with NaN where no peak lies inside the window.
+        """
+        r    = np.array([r], dtype = np.float64).reshape(-1)
+        step = self.r[1] - self.r[0]
+
+        peaks = np.full((len(r), polar.shape[0]), np.nan)
+        for i, r_i in enumerate(r):
+            idx_lo = max(int(np.searchsorted(self.r, r_i - half_width)), 0)
+            idx_hi = min(int(np.searchsorted(self.r, r_i + half_width)) + 1, len(self.r))
+            window = polar[:, idx_lo:idx_hi]
+            if window.shape[1] < 3: continue
+
+            # Vectorized argmax along r for all angles at once...
+            window   = np.where(np.isnan(window), -np.inf, window)
+            idx_peak = np.argmax(window, axis = 1)
+            is_inner = (idx_peak > 0) & (idx_peak < window.shape[1] - 1)
+            idx_peak = np.clip(idx_peak, 1, window.shape[1] - 2)
+
+            rows  = np.arange(window.shape[0])
+            v_lo  = window[rows, idx_peak - 1]
+            v_0   = window[rows, idx_peak]
+            v_hi  = window[rows, idx_peak + 1]
+            denom = v_lo - 2 * v_0 + v_hi
+            with np.errstate(invalid = 'ignore', divide = 'ignore'):
+                delta = np.where(denom < 0, 0.5 * (v_lo - v_hi) / denom, 0.0)
+
+            is_valid = is_inner & np.isfinite(v_lo + v_0 + v_hi)
+            peaks[i, is_valid] = self.r[idx_lo] + (idx_peak[is_valid] + delta[is_valid]) * step
+
+        return peaks
+
+
+    def refine_center(self, img, cx, cy, r, half_width = 5.0, num_passes = 3):
+        """
+        Refine the center and radii of concentric rings in a few polar passes.
+
+        Seen from a center off by (dx, dy), ring i lies at
+        r_i(theta) = R_i + dx cos(theta) + dy sin(theta) to first order, which
+        is solved for (dx, dy, R_i) by linear least squares over all rings.
+        Return (cx, cy, r).
+        """
+        r = np.array([r], dtype = np.float64).reshape(-1)
+        num_rings = len(r)
+        cos_theta, sin_theta = np.cos(self.theta), np.sin(self.theta)
+
+        for _ in range(num_passes):
+            polar, (cx, cy) = self.remap(img, cx, cy)
+            peaks = self.find_peaks(polar, r, half_width)
+
+            # Design matrix of the linearized model for all rings...
+            idx_ring, idx_theta = np.nonzero(np.isfinite(peaks))
+            if len(idx_ring) < 2 + num_rings: break
+            A = np.zeros((len(idx_ring), 2 + num_rings))
+            A[:, 0] = cos_theta[idx_theta]
+            A[:, 1] = sin_theta[idx_theta]
+            A[np.arange(len(idx_ring)), 2 + idx_ring] = 1.0
+
+            sol, *_ = np.linalg.lstsq(A, peaks[idx_ring, idx_theta], rcond = None)
+            cx, cy = cx + sol[0], cy + sol[1]
+            r = sol[2:]
+
+        return cx, cy, r
@@ -0,0 +1,443 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import numpy as np
+
+
+class FramePool:
+    """
+    Single-pass, constant-memory aggregation of frames.  Pools of the same
+    kind can be merged, so each worker or rank can pool its own share of a run
+    and the partial results are combined at the end.
+
+    Subclasses implement `update_state`, `merge_state` and `result`, and list
+    the attributes holding their accumulators in `state_names`.
+    """
+
+    state_names = ()
+
+    def __init__(self):
+        self.count = 0
+
+
+    def update(self, frame):
+        """
+        Fold one frame into the pool.  The frame is only read, so a view into
+        a shared buffer can be passed in directly.
+        """
+        self.update_state(frame)
+        self.count += 1
+
+        return None
+
+
+    def merge(self, other):
+        """
+        Merge the partial result of another pool, e.g. from another worker.
+        """
+        if other.count == 0: return self
+
+        self.merge_state(other)
+        self.count += other.count
+
+        return self
+
+
+    def state_dict(self):
+        """
+        Return the accumulators as a dict of arrays, e.g. for checkpointing.
+        """
+        state = { "count" : np.asarray(self.count) }
+        for k in self.state_names:
+            v = getattr(self, k)
+            if v is not None: state[k] = np.asarray(v)
+
+        return state
+
+
+    def load_state_dict(self, state):
+        self.count = int(state["count"])
+        for k in self.state_names:
+            if k in state: setattr(self, k, np.array(state[k]))
+
+        return self
+
+
+    def normalized(self):
+        """
+        Return the pooled image normalized to zero mean and unit variance, as
+        done before fitting.
+        """
+        img = self.result()
+
+        return (img - np.mean(img)) / np.std(img)
+
+
+
+
+class MaxPool(FramePool):
+    """
+    Keep the element-wise maximum of all frames.
+    """
+
+    state_names = ("img", )
+
+    def __init__(self):
+        super().__init__()
+
+        self.img = None
+
+
+    def update_state(self, frame):
+        if self.img is None:
+            self.img = np.array(frame, dtype = np.float64)
+        else:
+            np.maximum(self.img, frame, out = self.img)
+
+
+    def merge_state(self, other):
+        if self.img is None:
+            self.img = other.img.copy()
+        else:
+            np.maximum(self.img, other.img, out = self.img)
+
+
+    def result(self):
+        return self.img
+
+
+
+
+class SumPool(FramePool):
+    """
+    Keep the element-wise sum of all frames.
+    """
+
+    state_names = ("img", )
+
+    def __init__(self):
+        super().__init__()
+
+        self.img = None
+
+
+    def update_state(self, frame):
+        if self.img is None:
+            self.img = np.array(frame, dtype = np.float64)
+        else:
+            self.img += frame
+
+
+    def merge_state(self, other):
+        if self.img is None:
+            self.img = other.img.copy()
+        else:
+            self.img += other.img
+
+
+    def result(self):
+        return self.img
+
+
+
+
+class MeanVarPool(FramePool):
+    """
+    Keep the element-wise mean and variance of all frames with Welford's
+    algorithm.  Partial results are combined with the parallel update by Chan
+    et al., so merging is exact.
+    """
+
+    state_names = ("mean", "m2")
+
+    def __init__(self):
+        super().__init__()
+
+        self.mean = None    # Running mean
+        self.m2   = None    # Running sum of squared deviations from the mean
+
+
+    def update_state(self, frame):
+        if self.mean is None:
+            self.mean = np.array(frame, dtype = np.float64)
+            self.m2   = np.zeros_like(self.mean)
+
+            return None
+
+        delta = frame - self.mean
+        self.mean += delta / (self.count + 1)
+        self.m2   += delta * (frame - self.mean)
+
+        return None
+
+
+    def merge_state(self, other):
+        if self.mean is None:
+            self.mean = other.mean.copy()
+            self.m2   = other.m2.copy()
+
+            return None
+
+        n_a, n_b = self.count, other.count
+        n        = n_a + n_b
+        delta    = other.mean - self.mean
+        self.mean += delta * (n_b / n)
+        self.m2   += other.m2 + delta**2 * (n_a * n_b / n)
+
+        return None
+
+
+    def result(self):
+        return self.mean
+
+
+    def variance(self, ddof = 0):
+        return self.m2 / max(self.count - ddof, 1)
+
+
+    def std(self, ddof = 0):
+        return np.sqrt(self.variance(ddof = ddof))
+
+
+
+
+class QuantilePool(FramePool):
+    """
+    Approximate element-wise quantiles from a per-pixel histogram over fixed
+    bins in [vmin, vmax).  Values out of range are counted in the first or
+    last bin.  Histograms with the same bins merge exactly.
+
+    Memory is `num_bins` counters per pixel, e.g. 64 bins of uint32 for a
+    2M-pixel detector take 512 MB; pass dtype = np.uint16 when fewer than
+    65536 frames are pooled.
+    """
+
+    state_names = ("hist", "shape")
+
+    def __init__(self, vmin, vmax, num_bins = 64, q = 0.99, dtype = np.uint32):
+        super().__init__()
+
+        self.vmin     = vmin
+        self.vmax     = vmax
+        self.num_bins = num_bins
+        self.q        = q
+        self.dtype    = dtype
+        self.hist     = None    # Shape (num_pixels, num_bins)
+        self.shape    = None
+
+
+    def update_state(self, frame):
+        frame = np.asarray(frame)
+        if self.hist is None:
+            self.shape = frame.shape
+            self.hist  = np.zeros((frame.size, self.num_bins), dtype = self.dtype)
+            self.idx_pixel = np.arange(frame.size)
+
+        # Find the bin of each pixel value...
+        scale   = self.num_bins / (self.vmax - self.vmin)
+        idx_bin = ((frame.reshape(-1) - self.vmin) * scale).astype(np.int64)
+        np.clip(idx_bin, 0, self.num_bins - 1, out = idx_bin)
+
+        # Every pixel has its own row, so no index repeats...
+        self.hist[self.idx_pixel, idx_bin] += 1
+
+        return None
+
+
+    def merge_state(self, other):
+        if self.hist is None:
+            self.shape     = other.shape
+            self.hist      = other.hist.copy()
+            self.idx_pixel = np.arange(self.hist.shape[0])
+        else:
+            self.hist += other.hist
+
+
+    def load_state_dict(self, state):
+        super().load_state_dict(state)
+        if self.hist is not None:
+            if self.hist.shape[1] != self.num_bins: raise ValueError(f"Checkpoint has {self.hist.shape[1]} bins, but {self.num_bins} are expected!!!")
+
+            self.hist      = self.hist.astype(self.dtype, copy = False)
+            self.shape     = tuple(int(v) for v in self.shape)
+            self.idx_pixel = np.arange(self.hist.shape[0])
+
+        return self
+
+
+    def quantile(self, q):
+        """
+        Interpolate the q-th quantile of each pixel linearly within its bin.
+        """
+        cdf    = np.cumsum(self.hist, axis = 1, dtype = np.float64)
+        target = q * self.count
+
+        # Locate the first bin whose cumulative count reaches the target...
+        idx_bin = np.sum(cdf < target, axis = 1)
+        np.clip(idx_bin, 0, self.num_bins - 1, out = idx_bin)
+        idx_pixel = np.arange(cdf.shape[0])
+        cdf_hi  = cdf[idx_pixel, idx_bin]
+        cnt_bin = self.hist[idx_pixel, idx_bin]
+        frac    = np.divide(cnt_bin - (cdf_hi - target), cnt_bin, out = np.zeros_like(cdf_hi), where = cnt_bin > 0)
+
+        width = (self.vmax - self.vmin) / self.num_bins
+        img   = self.vmin + (idx_bin + np.clip(frac, 0.0, 1.0)) * width
+
+        return img.reshape(self.shape)
+
+
+    def result(self):
+        return self.quantile(self.q)
+
+
+
+
+class PixelMapAssembler:
+    """
+    Assemble an unassembled detector array, e.g. (seg, rows, cols), into a 2D
+    image given the image row and column of every pixel, such as those from
+    psana's `detector.indexes_xy`.
+
+    Element-wise pools commute with this remapping, so frames can be pooled
+    in the native layout and only the pooled result needs to be assembled.
+    Pixels of the image that no detector pixel maps to take `fill`.
+    """
+
+    def __init__(self, iy, ix, shape = None, fill = 0.0):
+        self.iy    = np.asarray(iy, dtype = np.int64).reshape(-1)
+        self.ix    = np.asarray(ix, dtype = np.int64).reshape(-1)
+        self.shape = (self.iy.max() + 1, self.ix.max() + 1) if shape is None else tuple(shape)
+        self.fill  = fill
+
+
+    def __call__(self, unassembled):
+        unassembled = np.asarray(unassembled)
+        img = np.full(self.shape, self.fill, dtype = unassembled.dtype)
+        img[self.iy, self.ix] = unassembled.reshape(-1)
+
+        return img
+
+
+
+
+class PoolCheckpoint:
+    """
+    Periodically save the accumulators of a pool along with how far into the
+    event list pooling got, so that a preempted job can resume.
+
+    A checkpoint is written to a temporary file next to `path` and moved over
+    the previous one, so a crash while saving never leaves a broken file.
+    Saving is spaced out so that it takes at most `max_overhead` of the
+    runtime, and happens no more often than every `min_interval` seconds.
+
+    Ranks should write their own checkpoints, e.g. `pool.rank0.npz`, which
+    `merge_checkpoints` combines at the end.
+    """
+
+    def __init__(self, path, max_overhead = 0.05, min_interval = 60.0):
+        self.path         = path
+        self.max_overhead = max_overhead
+        self.min_interval = min_interval
+        self.time_next    = time.monotonic() + min_interval
+
+
+    def save(self, pool, num_processed, event_last = -1):
+        state = pool.state_dict()
+        state["kind"]          = np.asarray(type(pool).__name__)
+        state["num_processed"] = np.asarray(num_processed)
+        state["event_last"]    = np.asarray(event_last)
+
+        # Write to a temporary file first, then swap it in...
+        path_tmp = f"{self.path}.tmp"
+        with open(path_tmp, "wb") as fh:
+            np.savez(fh, **state)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(path_tmp, self.path)
+
+        return None
+
+
+    def maybe_save(self, pool, num_processed, event_last = -1):
+        """
+        Save only if enough time has passed to keep within the overhead
+        budget.  Return True if a checkpoint was written.
+        """
+        time_start = time.monotonic()
+        if time_start < self.time_next: return False
+
+        self.save(pool, num_processed, event_last)
+
+        # Wait long enough that this save is a small share of the time until the next one...
+        time_save      = time.monotonic() - time_start
+        self.time_next = time_start + max(self.min_interval, time_save / self.max_overhead)
+
+        return True
+
+
+    def load(self, pool):
+        """
+        Restore a pool from the checkpoint if there is one, and return the
+        number of entries of the event list already processed.
+        """
+        return load_checkpoint(self.path, pool) if os.path.exists(self.path) else 0
+
+
+
+
+def load_checkpoint(path, pool):
+    """
+    Restore a pool from a checkpoint file and return the number of entries of
+    the event list already processed.
+    """
+    with np.load(path) as state:
+        kind = str(state["kind"])
+        if kind != type(pool).__name__: raise ValueError(f"Checkpoint {path} holds a {kind}, not a {type(pool).__name__}!!!")
+
+        pool.load_state_dict(state)
+        num_processed = int(state["num_processed"])
+
+    return num_processed
+
+
+def merge_checkpoints(paths, make_pool):
+    """
+    Merge the partial pools saved by several ranks into one pool.
+    """
+    pool = make_pool()
+    for path in paths:
+        other = make_pool()
+        load_checkpoint(path, other)
+        pool.merge(other)
+
+    return pool
+
+
+def pool_frames(read_frame, event_nums, pool, accept_frame = None, checkpoint = None):
+    """
+    Pool frames serially.  Frames that are None or rejected by `accept_frame`
+    are skipped.
+
+    With a `PoolCheckpoint`, pooling resumes after the last checkpointed
+    entry of `event_nums`, which must then be the same sequence as before.
+
+    Frames are pooled in whatever layout `read_frame` returns.  Reading
+    unassembled frames and assembling the result once, with e.g.
+    `PixelMapAssembler` or a Cheetah `DetectorDescriptor.pct`, saves a
+    geometric remap per frame.
+    """
+    event_nums = list(event_nums)
+    idx_start  = 0 if checkpoint is None else checkpoint.load(pool)
+
+    for idx in range(idx_start, len(event_nums)):
+        event_num = event_nums[idx]
+        frame = read_frame(event_num)
+        if frame is not None and (accept_frame is None or accept_frame(frame)): pool.update(frame)
+
+        if checkpoint is not None: checkpoint.maybe_save(pool, idx + 1, event_num)
+
+    if checkpoint is not None and len(event_nums) > 0: checkpoint.save(pool, len(event_nums), event_nums[-1])
+
+    return pool
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+from scipy.signal import find_peaks
+
+
+class RadialProfile:
+    """
+    Azimuthally averaged intensity around a center.
+
+    The radial bin of every pixel is computed once, so each profile is a pair
+    of `np.bincount` calls over the image.  Masked pixels (mask == 0) are left
+    out.
+    """
+
+    def __init__(self, shape, cx, cy, bin_size = 1.0, mask = None):
+        self.shape    = tuple(shape)
+        self.cx       = cx
+        self.cy       = cy
+        self.bin_size = bin_size
+
+        y, x = np.ogrid[:shape[0], :shape[1]]
+        r = np.hypot(x - cx, y - cy)
+        self.idx_bin  = (r / bin_size).astype(np.int64).reshape(-1)
+        self.num_bins = self.idx_bin.max() + 1
+
+        self.weights = None if mask is None else np.asarray(mask, dtype = np.float64).reshape(-1)
+        self.counts  = np.bincount(self.idx_bin, weights = self.weights, minlength = self.num_bins)
+
+        # Radius at the center of each bin...
+        self.r = (np.arange(self.num_bins) + 0.5) * bin_size
+
+
+    def __call__(self, img):
+        """
+        Return the mean intensity in each radial bin, NaN for empty bins.
+        """
+        img = np.asarray(img, dtype = np.float64).reshape(-1)
+        if self.weights is not None: img = img * self.weights
+        sums = np.bincount(self.idx_bin, weights = img, minlength = self.num_bins)
+
+        return np.divide(sums, self.counts, out = np.full(self.num_bins, np.nan), where = self.counts > 0)
+
+
+
+
+def find_rings(r, profile, prominence = 0.1, width = 1.0, r_min = 0.0, r_max = np.inf):
+    """
+    Find ring radii as peaks of a radial profile with at least the given
+    prominence and width (in bins), refined to sub-bin accuracy by a parabola.
+    Return the radii sorted from inner to outer, ready for
+    `OptimizeConcentricCircles`.
+    """
+    # Empty bins must not make up peaks...
+    profile = np.where(np.isnan(profile), np.nanmin(profile), profile)
+
+    idx_peak, _ = find_peaks(profile, prominence = prominence, width = width)
+    idx_peak = idx_peak[(idx_peak > 0) & (idx_peak < len(profile) - 1)]
+
+    v_lo, v_0, v_hi = profile[idx_peak - 1], profile[idx_peak], profile[idx_peak + 1]
+    denom = v_lo - 2 * v_0 + v_hi
+    delta = np.divide(0.5 * (v_lo - v_hi), denom, out = np.zeros_like(denom), where = denom < 0)
+
+    radii = np.interp(idx_peak + delta, np.arange(len(r)), r)
+
+    return radii[(radii >= r_min) & (radii <= r_max)]
+
+
+def match_d_spacings(radii, d_spacings, wavelength, tol = 2.0):
+    """
+    Match ring radii to a ladder of known d-spacings, where ring n lies at
+    r_n = L tan(2 theta_n) with sin(theta_n) = wavelength / (2 d_n).
+
+    The detector distance L (in pixels) is chosen among those implied by
+    pairing any ring with any d-spacing, as the one that places the most
+    rings within `tol` pixels of a predicted radius.  Return L and, for each
+    ring, the index of its d-spacing or -1 if unmatched.
+    """
+    radii      = np.asarray(radii, dtype = np.float64)
+    d_spacings = np.asarray(d_spacings, dtype = np.float64)
+
+    # Reflections beyond backscattering are unreachable...
+    sin_theta  = wavelength / (2 * d_spacings)
+    tan_2theta = np.full(len(d_spacings), np.nan)
+    is_valid   = sin_theta < 1
+    tan_2theta[is_valid] = np.tan(2 * np.arcsin(sin_theta[is_valid]))
+
+    # Score every candidate distance at once...
+    L_candidates = (radii[:, None] / tan_2theta[None, :]).reshape(-1)
+    L_candidates = L_candidates[np.isfinite(L_candidates) & (L_candidates > 0)]
+    if len(L_candidates) == 0: return np.nan, np.full(len(radii), -1)
+
+    dist = np.abs(radii[None, :, None] - L_candidates[:, None, None] * tan_2theta[None, None, :])
+    dist = np.where(np.isnan(dist), np.inf, dist)
+    dist_min    = dist.min(axis = 2)
+    num_matched = np.sum(dist_min <= tol, axis = 1)
+    residual    = np.sum(np.where(dist_min <= tol, dist_min, 0.0), axis = 1)
+
+    # Prefer more matches, then a smaller residual...
+    idx_best = np.lexsort((residual, -num_matched))[0]
+    L = L_candidates[idx_best]
+
+    idx_d = np.argmin(dist[idx_best], axis = 1)
+    idx_d[dist[idx_best].min(axis = 1) > tol] = -1
+
+    return L, idx_d
+
+
+def silver_behenate_d_spacings(num_rings = 30, d_001 = 58.380):
+    """
+    Return d-spacings in angstrom of the first `num_rings` (00l) reflections
+    of silver behenate, d_001 / l.
+    """
+    return d_001 / np.arange(1, num_rings + 1)
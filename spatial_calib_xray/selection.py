@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+
+class FrameStats:
+    """
+    Cheap per-frame statistics computed on a block-averaged view of a frame.
+
+    - total      : mean intensity of the frame.
+    - band_ratio : share of the intensity that falls in the annulus
+                   [r_inner, r_outer) around (cx, cy), a coarse radial band.
+                   Only available for assembled 2D frames when a center and
+                   a band are given.
+    - saturated  : fraction of pixels at or above `saturation`.
+
+    Positions and radii are in pixels of the full-resolution frame.
+    """
+
+    def __init__(self, bin_size   = 4,
+                       cx         = None,
+                       cy         = None,
+                       r_inner    = None,
+                       r_outer    = None,
+                       saturation = None):
+        self.bin_size   = bin_size
+        self.cx         = cx
+        self.cy         = cy
+        self.r_inner    = r_inner
+        self.r_outer    = r_outer
+        self.saturation = saturation
+
+        self.mask_band  = None    # Cached band mask on the downsampled grid
+
+
+    def names(self):
+        names = ["total"]
+        if None not in (self.cx, self.cy, self.r_inner, self.r_outer): names.append("band_ratio")
+        if self.saturation is not None: names.append("saturated")
+
+        return names
+
+
+    def downsample(self, frame):
+        """
+        Average over bin_size x bin_size blocks in the last two axes, dropping
+        any remainder.
+        """
+        b = self.bin_size
+        if b == 1: return frame
+
+        *lead, size_y, size_x = frame.shape
+        size_y, size_x = size_y // b * b, size_x // b * b
+        frame = frame[..., :size_y, :size_x]
+
+        return frame.reshape(*lead, size_y // b, b, size_x // b, b).mean(axis = (-3, -1))
+
+
+    def get_mask_band(self, shape):
+        """
+        Build the band mask for a downsampled frame of the given shape once.
+        """
+        if self.mask_band is None or self.mask_band.shape != shape:
+            b = self.bin_size
+            y, x = np.ogrid[:shape[0], :shape[1]]
+            r = np.hypot((x + 0.5) * b - 0.5 - self.cx, (y + 0.5) * b - 0.5 - self.cy)
+            self.mask_band = (r >= self.r_inner) & (r < self.r_outer)
+
+        return self.mask_band
+
+
+    def __call__(self, frame):
+        frame = np.asarray(frame)
+        stats = {}
+
+        is_band = "band_ratio" in self.names()
+        if is_band and frame.ndim != 2: raise ValueError(f"band_ratio needs an assembled 2D frame, got shape {frame.shape}!!!")
+
+        if self.saturation is not None: stats["saturated"] = np.mean(frame >= self.saturation)
+
+        img = self.downsample(frame)
+        total = img.sum()
+        stats["total"] = total / img.size
+
+        if is_band:
+            mask = self.get_mask_band(img.shape)
+            stats["band_ratio"] = img[mask].sum() / total if total != 0 else 0.0
+
+        return stats
+
+
+
+
+class FrameSelector:
+    """
+    Accept or reject frames by comparing FrameStats against limits, a dict
+    mapping a statistic name to a (lower, upper) pair where either bound can
+    be None, e.g.
+
+    ```
+    limits = { "total"     : (0.5, None),
+               "saturated" : (None, 0.01), }
+    ```
+    """
+
+    def __init__(self, stats, limits):
+        self.stats  = stats
+        self.limits = limits
+
+        names = stats.names()
+        for k in limits:
+            if k not in names: raise ValueError(f"Statistic {k} is not computed!!!  Available: {names}.")
+
+
+    def accept_stats(self, stats):
+        for k, (lower, upper) in self.limits.items():
+            v = stats[k]
+            if lower is not None and v < lower: return False
+            if upper is not None and v > upper: return False
+
+        return True
+
+
+    def __call__(self, frame):
+        """
+        Return True if the frame is worth pooling.
+        """
+        return self.accept_stats(self.stats(frame))
+
+
+    def select(self, read_frame, event_nums):
+        """
+        Run the selection pass over `event_nums` and return the accepted event
+        numbers along with a record of statistics for every frame read.
+        """
+        names  = self.stats.names()
+        dtype  = [ ("event_num", np.int64), ("accepted", np.bool_) ] + [ (k, np.float64) for k in names ]
+        record = []
+        for event_num in event_nums:
+            frame = read_frame(event_num)
+            if frame is None: continue
+
+            stats    = self.stats(frame)
+            accepted = self.accept_stats(stats)
+            record.append((event_num, accepted, *[ stats[k] for k in names ]))
+
+        record = np.array(record, dtype = dtype)
+
+        return record["event_num"][record["accepted"]], record
+
+
+
+
+def save_selection(path, event_nums):
+    """
+    Save selected event numbers so that later passes only read those.
+    """
+    np.save(path, np.asarray(event_nums, dtype = np.int64))
+
+
+def load_selection(path):
+    return np.load(path)
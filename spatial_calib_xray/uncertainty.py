@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import copy
+import numpy as np
+import lmfit
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+from scipy.ndimage import spline_filter
+
+
+# Model, image and spline coefficients of a worker, set once by init_worker...
+worker_state = {}
+
+
+def init_worker(model, name_shm, shape):
+    """
+    Attach to the shared image and its cubic spline coefficients.
+    """
+    shm = shared_memory.SharedMemory(name = name_shm)
+    arrays = np.ndarray((2, *shape), dtype = np.float64, buffer = shm.buf)
+
+    worker_state["shm"]    = shm
+    worker_state["model"]  = model
+    worker_state["img"]    = arrays[0]
+    worker_state["coeffs"] = arrays[1]
+
+
+def fit_draw(model, img, coeffs, params, rng, method = "bootstrap", jitter = 0.2):
+    """
+    Refit once from `params` with perturbed data.
+
+    "bootstrap" resamples the residual points with replacement, i.e. the
+    sample angles of every ring.  "jitter" moves every sample point by
+    normal noise of `jitter` pixels, as `update_crds_with_noise` does.
+    Return the fitted parameter values.
+    """
+    num_points = len(model.residual_model(params, img, coeffs = coeffs))
+
+    if method == "bootstrap":
+        idx = rng.integers(num_points, size = num_points)
+        fcn = lambda p: model.residual_model(p, img, coeffs = coeffs)[idx]
+    elif method == "jitter":
+        # Sample through a copy of the model that offsets every point...
+        offsets     = rng.normal(scale = jitter, size = (2, num_points))
+        model_draw  = copy.copy(model)
+        get_pvals   = type(model).get_pixel_values
+        model_draw.get_pixel_values = lambda img, crds = None, order = 3, coeffs = None: get_pvals(model_draw, img, crds + offsets, order, coeffs)
+        fcn = lambda p: model_draw.residual_model(p, img, coeffs = coeffs)
+    else:
+        raise ValueError(f"Method {method} is not supported!!!  Choose from ['bootstrap', 'jitter'].")
+
+    res = lmfit.minimize(fcn, params, method = 'leastsq', nan_policy = 'omit')
+
+    return model.unpack_params(res.params)
+
+
+def fit_draws(params, seed_seq, num_draws, method, jitter):
+    """
+    Run a chunk of draws in a worker with its own random generator.
+    """
+    rng = np.random.default_rng(seed_seq)
+    model, img, coeffs = worker_state["model"], worker_state["img"], worker_state["coeffs"]
+
+    return [ fit_draw(model, img, coeffs, params, rng, method = method, jitter = jitter) for _ in range(num_draws) ]
+
+
+def resample_fits(model, img, res, num_draws = 200, method = "bootstrap", jitter = 0.2, seed = None,
+                                                     chunk_size  = 10,
+                                                     max_workers = None,
+                                                     mp_context  = None):
+    """
+    Estimate the uncertainty of a fit by refitting perturbed data many times,
+    see `fit_draw` for the methods, warm-started from the nominal result
+    `res` of `model` on `img`.
+
+    The image and its spline coefficients are put in shared memory once for
+    all workers.  Draws run in chunks of `chunk_size`, each with a generator
+    spawned from `seed`, so the draws do not depend on the number of workers.
+    Return a structured array with one field per parameter and one row per
+    draw.
+    """
+    names = list(res.params.keys())
+    img   = np.asarray(img, dtype = np.float64)
+
+    # Share the image and its spline coefficients...
+    shm = shared_memory.SharedMemory(create = True, size = 2 * img.nbytes)
+    arrays = None
+    try:
+        arrays = np.ndarray((2, *img.shape), dtype = np.float64, buffer = shm.buf)
+        arrays[0] = img
+        arrays[1] = spline_filter(img, order = 3, output = np.float64, mode = 'constant')
+
+        num_chunks = (num_draws + chunk_size - 1) // chunk_size
+        seed_seqs  = np.random.SeedSequence(seed).spawn(num_chunks)
+        sizes      = [ min(chunk_size, num_draws - i * chunk_size) for i in range(num_chunks) ]
+
+        with ProcessPoolExecutor( max_workers = max_workers,
+                                  mp_context  = mp.get_context() if mp_context is None else mp_context,
+                                  initializer = init_worker,
+                                  initargs    = (model, shm.name, img.shape) ) as executor:
+            futures = [ executor.submit(fit_draws, res.params, seed_seq, size, method, jitter) for seed_seq, size in zip(seed_seqs, sizes) ]
+            values  = [ v for f in futures for v in f.result() ]
+    finally:
+        del arrays
+        shm.close()
+        shm.unlink()
+
+    draws = np.zeros(num_draws, dtype = [ (name, np.float64) for name in names ])
+    for name, column in zip(names, np.array(values).T): draws[name] = column
+
+    return draws
+
+
+def summarize_draws(draws):
+    """
+    Return the standard deviation, and the 16th and 84th percentiles, of
+    every parameter over the draws.
+    """
+    summary = {}
+    for name in draws.dtype.names:
+        lo, hi = np.percentile(draws[name], [16, 84])
+        summary[name] = { "std" : draws[name].std(ddof = 1), "p16" : lo, "p84" : hi }
+
+    return summary